@@ -0,0 +1,207 @@
+"""
+Benchmarks for the minesweeper board engine.
+Run with python benchmark.py <benchmark> [options]; see --help for the list.
+"""
+
+import argparse, multiprocessing, random, resource, time
+import chunkedboard, minesweeper
+
+
+def buildTileBoard(width, height, numMines):
+    """
+    Build a board the way Board did before it was array-backed:
+    a list of lists of Tile objects, numbered with per-tile method calls.
+    """
+    tiles = [[minesweeper.Tile(row, col) for col in xrange(width)] for row in xrange(height)]
+    for i in random.sample(xrange(width*height), numMines):
+        tiles[i / width][i % width].setMine()
+    for row in tiles:
+        for tile in row:
+            r, c = tile.getRow(), tile.getCol()
+            number = 0
+            if r > 0:
+                number += tiles[r-1][c].isMined()
+                if c > 0:
+                    number += tiles[r-1][c-1].isMined()
+                if c < width-1:
+                    number += tiles[r-1][c+1].isMined()
+            if r < height-1:
+                number += tiles[r+1][c].isMined()
+                if c > 0:
+                    number += tiles[r+1][c-1].isMined()
+                if c < width-1:
+                    number += tiles[r+1][c+1].isMined()
+            if c > 0:
+                number += tiles[r][c-1].isMined()
+            if c < width-1:
+                number += tiles[r][c+1].isMined()
+            tile.setNumber(number)
+    return tiles
+
+
+def countNeighborsLoop(mined, width, height):
+    """
+    Reference neighbor count: the per-tile loop Board used before countNeighbors.
+    """
+    numbers = bytearray(width*height)
+    for row in xrange(height):
+        for col in xrange(width):
+            i = row*width + col
+            number = 0
+            if row > 0:
+                number += mined[i-width]
+                if col > 0:
+                    number += mined[i-width-1]
+                if col < width-1:
+                    number += mined[i-width+1]
+            if row < height-1:
+                number += mined[i+width]
+                if col > 0:
+                    number += mined[i+width-1]
+                if col < width-1:
+                    number += mined[i+width+1]
+            if col > 0:
+                number += mined[i-1]
+            if col < width-1:
+                number += mined[i+1]
+            numbers[i] = number
+    return numbers
+
+
+def timeit(func, *args):
+    """
+    Return (seconds, result) of one call of func(*args).
+    """
+    start = time.time()
+    res = func(*args)
+    return time.time() - start, res
+
+
+def _measure(build, args, queue):
+    """
+    Run build(*args) and report its wall time and peak RSS growth in KB.
+    """
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    board = build(*args)  # @UnusedVariable
+    elapsed = time.time() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, after - before))
+
+
+def measure(build, *args):
+    """
+    Measure build(*args) in a fresh process so each run's RSS is independent.
+    Return (seconds, peak RSS growth in KB).
+    """
+    queue = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_measure, args=(build, args, queue))
+    proc.start()
+    res = queue.get()
+    proc.join()
+    return res
+
+
+def benchConstruct(options):
+    """
+    Compare construction time and memory of Board against the Tile-object layout.
+    """
+    print '%-12s %-8s %10s %12s %10s' % ('size', 'layout', 'seconds', 'RSS (KB)', 'B/tile')
+    for size in options.sizes:
+        numMines = int(size*size*options.density)
+        layouts = [('array', minesweeper.Board)]
+        if size <= options.max_tile_size:
+            layouts.append(('tiles', buildTileBoard))
+        for name, build in layouts:
+            elapsed, rss = measure(build, size, size, numMines)
+            print '%-12s %-8s %10.3f %12d %10.1f' % ('%dx%d' % (size, size), name, elapsed, rss,
+                                                      rss*1024. / (size*size))
+
+
+def benchNumbers(options):
+    """
+    Compare the per-tile neighbor count loop against countNeighbors.
+    """
+    print '%-12s %10s %12s %10s' % ('size', 'loop (s)', 'packed (s)', 'speedup')
+    for size in options.sizes:
+        mined = bytearray(size*size)
+        for i in random.sample(xrange(size*size), int(size*size*options.density)):
+            mined[i] = 1
+        loopTime, expected = timeit(countNeighborsLoop, mined, size, size)
+        packedTime, numbers = timeit(minesweeper.countNeighbors, mined, size, size)
+        assert numbers == expected, 'countNeighbors disagrees with the loop at %dx%d' % (size, size)
+        print '%-12s %10.3f %12.3f %9.1fx' % ('%dx%d' % (size, size), loopTime, packedTime,
+                                             loopTime / max(packedTime, 1e-9))
+
+
+def benchFlood(options):
+    """
+    Time the worst-case flood fill: uncovering one corner of a mine-free board.
+    """
+    print '%-12s %10s %12s %14s' % ('size', 'seconds', 'revealed', 'tiles/s')
+    for size in options.sizes:
+        board = minesweeper.Board(size, size, 0)
+        elapsed, revealed = timeit(board.revealTileAt, 0, 0)
+        assert board.getNumCoveredTiles() == 0
+        print '%-12s %10.3f %12d %14.0f' % ('%dx%d' % (size, size), elapsed, len(revealed),
+                                           len(revealed) / max(elapsed, 1e-9))
+
+
+def benchGenerate(options):
+    """
+    Time seeded mine placement with generateMineIndices and generateMines against
+    random.sample, sparse and at --density.
+    """
+    print '%-12s %10s %12s %12s %12s' % ('size', 'mines', 'sample (s)', 'indices (s)', 'generate (s)')
+    for size in options.sizes:
+        for numMines in (10, int(size*size*options.density)):
+            rng = random.Random(0)
+            sampleTime, mines = timeit(rng.sample, xrange(size*size), numMines)
+            indicesTime, mines = timeit(minesweeper.generateMineIndices, size, size, numMines, random.Random(0))
+            generateTime, mined = timeit(minesweeper.generateMines, size, size, numMines, random.Random(0))
+            print '%-12s %10d %12.4f %12.4f %12.4f' % ('%dx%d' % (size, size), numMines, sampleTime,
+                                                      indicesTime, generateTime)
+
+
+def benchChunked(options):
+    """
+    Time 200 uncovers at random spots of a ChunkedBoard and report the memory it holds.
+    """
+    print '%-14s %10s %10s %10s %12s' % ('size', 'seconds', 'loaded', 'saved', 'RSS (KB)')
+    for size in options.sizes:
+        board = chunkedboard.ChunkedBoard(size, size, int(size*size*options.density), seed=0)
+        rng = random.Random(0)
+        start = time.time()
+        for k in xrange(200):
+            board.uncoverTileAt(rng.randrange(size), rng.randrange(size))
+        elapsed = time.time() - start
+        print '%-14s %10.3f %10d %10d %12d' % ('%dx%d' % (size, size), elapsed, board.getNumLoadedChunks(),
+                                              len(board.saved), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+BENCHMARKS = {
+    'construct': (benchConstruct, [100, 500, 1000, 2000]),
+    'numbers': (benchNumbers, [100, 500, 1000, 2000, 4000]),
+    'flood': (benchFlood, [100, 500, 1000, 2000]),
+    'generate': (benchGenerate, [100, 1000, 4000]),
+    'chunked': (benchChunked, [1000, 10000, 100000]),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the minesweeper board engine.')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--sizes', type=int, nargs='+', help='board side lengths to benchmark')
+    parser.add_argument('--density', type=float, default=0.15,
+                        help='fraction of tiles that are mined')
+    parser.add_argument('--max-tile-size', type=int, default=2000,
+                        help='largest side length to run the Tile-object layout at')
+    options = parser.parse_args()
+    bench, defaultSizes = BENCHMARKS[options.benchmark]
+    if options.sizes is None:
+        options.sizes = defaultSizes
+    bench(options)
+
+
+if __name__ == '__main__':
+    main()
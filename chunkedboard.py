@@ -0,0 +1,268 @@
+"""
+A board backend for boards far larger than memory, e.g. 100000 x 100000.
+
+The board is split into square chunks. A chunk's mines are generated from the
+board's seed and the chunk's position only when the chunk is first touched, so
+untouched chunks cost nothing. At most maxChunks chunks are kept in memory; the
+least recently used one is dropped when another is loaded, keeping only its
+uncovered and flagged state (compressed) if the player has changed it.
+"""
+
+import random, zlib
+from collections import OrderedDict
+import minesweeper
+
+
+class Chunk(object):
+    """
+    The tiles of one chunk, stored like Board stores them: flat bytearrays indexed by row*width + col.
+    """
+    __slots__ = ('width', 'height', 'mined', 'numbers', 'uncovered', 'flagged')
+
+    def __init__(self, width, height, mined, numbers):
+        self.width = width
+        self.height = height
+        self.mined = mined
+        self.numbers = numbers
+        self.uncovered = bytearray(width*height)
+        self.flagged = bytearray(width*height)
+
+    def isChanged(self):
+        return '\x01' in self.uncovered or '\x01' in self.flagged
+
+
+class ChunkedBoard(object):
+    """
+    A minesweeper board whose tiles are created chunk by chunk on demand.
+    Has the same uncoverTileAt, revealTileAt, flagTileAt and getTileAt interface as
+    Board, with flood fills crossing chunk boundaries.
+    """
+
+    def __init__(self, width, height, numMines, seed = 0, chunkSize = 64, maxChunks = 256):
+        """
+        Initialize the board of dimensions width X height and with numMines mines.
+        The same seed always gives the same mine layout.
+        """
+        if not 0 <= numMines <= width*height:
+            raise ValueError('Cannot place ' + str(numMines) + ' mines on ' + str(width*height) + ' tiles')
+        self.width = width
+        self.height = height
+        self.numTiles = width * height
+        self.numMines = numMines
+        self.numCoveredTiles = self.numTiles
+        self.numFlaggedTiles = 0
+        self.seed = seed
+        self.chunkSize = chunkSize
+        self.maxChunks = max(maxChunks, 4) # a flood fill works on two chunks at a time
+        self.chunkRows = (height + chunkSize - 1) // chunkSize
+        self.chunkCols = (width + chunkSize - 1) // chunkSize
+        self.chunks = OrderedDict() # (chunk row, chunk col) -> Chunk, least recently used first
+        self.saved = {} # (chunk row, chunk col) -> compressed state of evicted chunks the player changed
+        self.layouts = OrderedDict() # (chunk row, chunk col) -> mine layout, shared by neighboring chunk loads
+        self.lastKey = None # key and Chunk of the most recent lookup
+        self.lastChunk = None
+
+    def chunkShape(self, chunkRow, chunkCol):
+        """
+        Return the (width, height) of a chunk; chunks on the right and bottom edges may be smaller.
+        """
+        return (min(self.chunkSize, self.width - chunkCol*self.chunkSize),
+                min(self.chunkSize, self.height - chunkRow*self.chunkSize))
+
+    def chunkMineCount(self, chunkRow, chunkCol):
+        """
+        Return the number of mines in a chunk.
+        Mines are shared out in proportion to the tiles before each chunk, in row-major
+        chunk order, so the counts add up to exactly numMines.
+        """
+        width, height = self.chunkShape(chunkRow, chunkCol)
+        before = chunkRow*self.chunkSize*self.width + height*chunkCol*self.chunkSize
+        after = before + width*height
+        return self.numMines*after // self.numTiles - self.numMines*before // self.numTiles
+
+    def chunkMines(self, chunkRow, chunkCol):
+        """
+        Return the mine layout of a chunk, generated from the seed and the chunk's position.
+        The layouts of the 2*maxChunks most recently used chunks are cached, since
+        loading a chunk needs the layouts of the eight chunks around it too.
+        """
+        key = (chunkRow, chunkCol)
+        mined = self.layouts.pop(key, None)
+        if mined is None:
+            width, height = self.chunkShape(chunkRow, chunkCol)
+            rng = random.Random((self.seed << 64) | (chunkRow << 32) | chunkCol)
+            mined = minesweeper.generateMines(width, height, self.chunkMineCount(chunkRow, chunkCol), rng)
+            if len(self.layouts) >= 2*self.maxChunks:
+                self.layouts.popitem(last=False)
+        self.layouts[key] = mined
+        return mined
+
+    def loadChunk(self, chunkRow, chunkCol):
+        """
+        Build a chunk, counting neighbors across its edges from the mines of the chunks around it.
+        """
+        width, height = self.chunkShape(chunkRow, chunkCol)
+        mined = self.chunkMines(chunkRow, chunkCol)
+        padded = bytearray((width+2)*(height+2)) # the chunk's mines with a one tile border
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                r, c = chunkRow + dr, chunkCol + dc
+                if not (0 <= r < self.chunkRows and 0 <= c < self.chunkCols):
+                    continue
+                mines = mined if dr == dc == 0 else self.chunkMines(r, c)
+                w, h = self.chunkShape(r, c)
+                rows = [h-1] if dr < 0 else xrange(h) if dr == 0 else [0] # rows touching this chunk
+                cols = (w-1, w) if dc < 0 else (0, w) if dc == 0 else (0, 1)
+                dest = (0 if dr < 0 else 1 if dr == 0 else height+1)*(width+2) + (0 if dc < 0 else 1 if dc == 0 else width+1)
+                for k, row in enumerate(rows):
+                    start = dest + k*(width+2)
+                    padded[start:start + cols[1] - cols[0]] = mines[row*w + cols[0]:row*w + cols[1]]
+        counts = minesweeper.countNeighbors(padded, width+2, height+2)
+        numbers = bytearray(width*height)
+        for row in xrange(height):
+            start = (row+1)*(width+2) + 1
+            numbers[row*width:(row+1)*width] = counts[start:start+width]
+        chunk = Chunk(width, height, mined, numbers)
+        state = self.saved.pop((chunkRow, chunkCol), None)
+        if state is not None:
+            state = zlib.decompress(state)
+            chunk.uncovered = bytearray(state[:width*height])
+            chunk.flagged = bytearray(state[width*height:])
+        return chunk
+
+    def getChunk(self, chunkRow, chunkCol):
+        """
+        Return a chunk, loading it and evicting the least recently used chunk if needed.
+        """
+        key = (chunkRow, chunkCol)
+        chunk = self.chunks.pop(key, None)
+        if chunk is None:
+            chunk = self.loadChunk(chunkRow, chunkCol)
+            while len(self.chunks) >= self.maxChunks:
+                oldKey, old = self.chunks.popitem(last=False)
+                if old.isChanged():
+                    self.saved[oldKey] = zlib.compress(str(old.uncovered) + str(old.flagged))
+        self.chunks[key] = chunk
+        self.lastKey = key
+        self.lastChunk = chunk
+        return chunk
+
+    def locate(self, row, col):
+        """
+        Return (chunk, index within chunk) of the tile at row, col.
+        """
+        key = (row // self.chunkSize, col // self.chunkSize)
+        chunk = self.lastChunk if key == self.lastKey else self.getChunk(*key)
+        return chunk, (row % self.chunkSize)*chunk.width + col % self.chunkSize
+
+    def checkBounds(self, row, col):
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise IndexError('Tile (' + str(row) + ', ' + str(col) + ') is off the board')
+
+    def uncoverTileAt(self, row, col):
+        """
+        Uncover a tile at row 'row' and col 'col', like Board.uncoverTileAt.
+        Return True if tile is mined, False if tile is not mined.
+        """
+        self.revealTileAt(row, col)
+        chunk, i = self.locate(row, col)
+        return chunk.mined[i] == 1
+
+    def revealTileAt(self, row, col):
+        """
+        Uncover a tile at row 'row' and col 'col' and flood-fill outwards from it, like Board.revealTileAt.
+        Return a list of the indices (row*width + col) of the newly uncovered tiles.
+        """
+        self.checkBounds(row, col)
+        chunk, i = self.locate(row, col)
+        if chunk.flagged[i]: # check if tile is currently flagged
+            raise minesweeper.UncoverError('Tile is flagged. Unflag this tile first.')
+        revealed = []
+        if not chunk.uncovered[i]:
+            chunk.uncovered[i] = 1
+            revealed.append(row*self.width + col)
+        # only check adjacent tiles if this tile's number is 0 and this tile isn't mined
+        stack = [(row, col)] if chunk.numbers[i] == 0 and not chunk.mined[i] else []
+        while stack:
+            row, col = stack.pop()
+            for r, c in ((row-1, col), (row+1, col), (row, col-1), (row, col+1)):
+                if not (0 <= r < self.height and 0 <= c < self.width):
+                    continue
+                chunk, i = self.locate(r, c)
+                if not chunk.uncovered[i] and not chunk.mined[i] and not chunk.flagged[i]:
+                    chunk.uncovered[i] = 1
+                    revealed.append(r*self.width + c)
+                    if chunk.numbers[i] == 0:
+                        stack.append((r, c))
+        self.numCoveredTiles -= len(revealed)
+        return revealed
+
+    def flagTileAt(self, row, col):
+        """
+        Flag/unflag tile at row 'row' and col 'col', like Board.flagTileAt.
+        """
+        self.checkBounds(row, col)
+        chunk, i = self.locate(row, col)
+        if not chunk.flagged[i] and self.numFlaggedTiles >= self.numMines:
+            raise minesweeper.FlagError('Too many flags. Max number of flags is ' + str(self.numMines))
+        chunk.flagged[i] ^= 1
+        if chunk.flagged[i]:
+            self.numFlaggedTiles += 1
+        else:
+            self.numFlaggedTiles -= 1
+
+    def getTileAt(self, row, col):
+        """
+        Return a ChunkTileView of the tile at row 'row' and col 'col'.
+        """
+        self.checkBounds(row, col)
+        return ChunkTileView(self, row, col)
+
+    def getNumTiles(self):
+        return self.numTiles
+
+    def getNumMines(self):
+        return self.numMines
+
+    def getNumCoveredTiles(self):
+        return self.numCoveredTiles
+
+    def getNumFlaggedTiles(self):
+        return self.numFlaggedTiles
+
+    def getNumLoadedChunks(self):
+        return len(self.chunks)
+
+
+class ChunkTileView(object):
+    """
+    A lightweight view of one tile of a ChunkedBoard, with the read-only part of the Tile interface.
+    """
+    __slots__ = ('board', 'row', 'col')
+
+    def __init__(self, board, row, col):
+        self.board = board
+        self.row = row
+        self.col = col
+
+    def get(self, attr):
+        chunk, i = self.board.locate(self.row, self.col)
+        return getattr(chunk, attr)[i]
+
+    def getRow(self):
+        return self.row
+
+    def getCol(self):
+        return self.col
+
+    def isUncovered(self):
+        return self.get('uncovered') == 1
+
+    def isMined(self):
+        return self.get('mined') == 1
+
+    def isFlagged(self):
+        return self.get('flagged') == 1
+
+    def getNumber(self):
+        return self.get('numbers')
@@ -0,0 +1,26 @@
+"""
+Shared pytest fixtures. Living at the repository root, this also puts the
+root on sys.path so the tests can import the game modules.
+"""
+
+import pytest
+import minesweeper
+
+
+@pytest.fixture
+def board():
+    """
+    A 10x10 board with mines down the main diagonal.
+    """
+    mined = bytearray(100)
+    for i in xrange(10):
+        mined[i*10 + i] = 1
+    return minesweeper.Board(10, 10, 10, mined)
+
+
+@pytest.fixture
+def emptyBoard():
+    """
+    A 10x10 board without mines.
+    """
+    return minesweeper.Board(10, 10, 0)
@@ -0,0 +1,208 @@
+"""
+Opt-in counters and latency histograms for the game's hot paths.
+
+Nothing is recorded until enable() is called. enable() wraps the Board methods that
+make and change boards, and the timer() blocks in main.py start measuring; before
+that they cost one flag check. Latencies are kept in power-of-two buckets of
+microseconds, so recording one is a few dict operations however long the session.
+On exit the counters and histograms are written as JSON, and if asked, a cProfile
+profile of the whole session is written alongside for pstats or snakeviz:
+
+    instrument.enable('stats.json', 'session.prof')
+"""
+
+import atexit, cProfile, functools, json, time
+import minesweeper
+
+enabled = False
+counters = {}
+histograms = {}
+profiler = None
+originals = {} # Board methods replaced by timed wrappers, by name
+
+
+class Histogram(object):
+    """
+    Counts of values in power-of-two buckets: bucket k holds values v with
+    2**(k-1) <= v < 2**k, and bucket 0 holds values below 1.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.
+        self.max = 0
+
+    def add(self, value):
+        k = int(value).bit_length()
+        self.buckets[k] = self.buckets.get(k, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def getPercentile(self, p):
+        """
+        Return an upper bound on the value at percentile p (0-100): the top of its bucket.
+        """
+        rank = p/100.*self.count
+        seen = 0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if seen >= rank:
+                return min(2**k, self.max)
+        return self.max
+
+    def toDict(self):
+        return {'count': self.count, 'mean': self.total / max(self.count, 1), 'max': self.max,
+                'p50': self.getPercentile(50), 'p90': self.getPercentile(90), 'p99': self.getPercentile(99),
+                'buckets': dict(('<%d' % 2**k, n) for k, n in self.buckets.iteritems())}
+
+
+def count(name, n = 1):
+    """
+    Add n to the counter called name, if instrumentation is enabled.
+    """
+    if enabled:
+        counters[name] = counters.get(name, 0) + n
+
+
+def record(name, value):
+    """
+    Add value to the histogram called name, if instrumentation is enabled.
+    """
+    if enabled:
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = Histogram()
+        histogram.add(value)
+
+
+class Timer(object):
+    """
+    A with block that records how long it took, in microseconds, in the histogram called name.
+    """
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *excInfo):
+        record(self.name, (time.time() - self.start)*1e6)
+
+
+class NullTimer(object):
+    """
+    The with block timer() returns while instrumentation is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excInfo):
+        pass
+
+NULL_TIMER = NullTimer()
+
+
+def timer(name):
+    """
+    Return a with block that times itself into the histogram called name,
+    or does nothing if instrumentation is disabled.
+    """
+    return Timer(name) if enabled else NULL_TIMER
+
+
+def timed(name, sizeName = None):
+    """
+    Decorate a function so each call is timed into the histogram called name.
+    If sizeName is given, the length of each result is recorded in the histogram called sizeName,
+    for functions such as Board.revealTileAt that return the tiles they changed.
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.time()
+            res = func(*args, **kwargs)
+            record(name, (time.time() - start)*1e6)
+            if sizeName is not None:
+                record(sizeName, len(res))
+            return res
+        return wrapper
+    return decorate
+
+
+# Board methods timed while instrumentation is enabled, as (name, histogram, size histogram).
+# uncoverTileAt goes through revealTileAt, so it is counted there.
+BOARD_METHODS = [('__init__', 'board.init', None),
+                 ('revealTileAt', 'board.uncover', 'board.uncover.tiles'),
+                 ('chordTileAt', 'board.chord', 'board.chord.tiles'),
+                 ('uncoverMany', 'board.uncoverMany', 'board.uncoverMany.tiles'),
+                 ('flagTileAt', 'board.flag', None)]
+
+
+def enable(statsPath = None, profilePath = None):
+    """
+    Start recording, timing the Board methods in BOARD_METHODS.
+    On exit, write the counters and histograms to statsPath as JSON and, if profilePath
+    is given, a cProfile profile of everything run from now on to profilePath.
+    """
+    global enabled, profiler
+    enabled = True
+    for method, name, sizeName in BOARD_METHODS:
+        if method not in originals:
+            originals[method] = minesweeper.Board.__dict__[method]
+            setattr(minesweeper.Board, method, timed(name, sizeName)(originals[method]))
+    if profilePath is not None and profiler is None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if statsPath is not None or profilePath is not None:
+        atexit.register(dump, statsPath, profilePath)
+
+
+def disable():
+    """
+    Stop recording and restore the Board methods. What was recorded is kept.
+    """
+    global enabled
+    enabled = False
+    for method, func in originals.iteritems():
+        setattr(minesweeper.Board, method, func)
+    originals.clear()
+    if profiler is not None:
+        profiler.disable()
+
+
+def reset():
+    """
+    Forget all counters and histograms.
+    """
+    counters.clear()
+    histograms.clear()
+
+
+def getStats():
+    """
+    Return the counters and histograms as a dict ready for json.dump.
+    """
+    return {'counters': dict(counters),
+            'histograms': dict((name, h.toDict()) for name, h in histograms.iteritems())}
+
+
+def dump(statsPath = None, profilePath = None):
+    """
+    Write the counters and histograms to statsPath as JSON, and the profile to profilePath.
+    """
+    if statsPath is not None:
+        with open(statsPath, 'w') as f:
+            json.dump(getStats(), f, indent=2, sort_keys=True)
+    if profilePath is not None and profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profilePath)
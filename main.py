@@ -3,29 +3,26 @@
 # TO DO: implement menu
 # TO DO: sound effects
 
+import time
+startTime = time.time() # for the startup timings
 import pygame, sys, os
 from pygame.locals import *  # @UnusedWildImport
-import minesweeper
+import instrument, minesweeper, render
 
 os.environ['SDL_VIDEO_WINDOW_POS'] = 'center'
-# fonts
-pygame.font.init()
-smallFont = pygame.font.SysFont('arial', 14)
-medFont = pygame.font.SysFont('arial', 24)
-bigFont = pygame.font.SysFont('arial', 96, True)
+# fonts, as (name, size, bold) for render.FontCache
+SMALL_FONT = ('arial', 14)
+MED_FONT = ('arial', 24)
+BIG_FONT = ('arial', 96, True)
+FONT_CACHE = os.path.join(os.path.expanduser('~'), '.minesweeper-fonts.json') # font files found by SysFont
 
 # graphics
-pygame.display.init()
-pygame.display.set_caption('Minesweeper v0.1')
-screen = pygame.display.set_mode((640,640),0,32)
-coveredTile = pygame.image.load('sprites/spr_covered_tile.png').convert_alpha()
-uncoveredTiles = {}
-for num in xrange(9):
-    uncoveredTiles[num] = pygame.image.load('sprites/spr_uncovered_tile_' + `num` + '.png').convert_alpha()
-flaggedTile = pygame.image.load('sprites/spr_flagged_tile.png').convert_alpha()
-minedTile = pygame.image.load('sprites/spr_mined_tile.png').convert_alpha()
-selectedMinedTile = pygame.image.load('sprites/spr_selected_mined_tile.png').convert_alpha()
-correctTile = pygame.image.load('sprites/spr_correct_tile.png').convert_alpha()
+uncoveredTiles = ['uncovered_%d' % num for num in xrange(9)] # sprite names by number
+SPRITES = ([(name, os.path.join('sprites', 'spr_%s_tile.png' % name))
+            for name in ('covered', 'flagged', 'mined', 'selected_mined', 'correct')] +
+           [(name, os.path.join('sprites', 'spr_uncovered_tile_%d.png' % num))
+            for num, name in enumerate(uncoveredTiles)])
+atlas = None # loaded when the first tiles are drawn
 
 # constants and globals
 X_OFFSET = 70
@@ -33,112 +30,357 @@ Y_OFFSET = 70
 NUM_ROWS_IN_GRID = 10
 NUM_COLS_IN_GRID = 10
 NUM_MINES = 10
+SAFE_RADIUS = 1 # no mines within this many tiles of the first click
 LINE_WIDTH = 3
-RECT_SIZE = 50
+RECT_SIZE = 50 # initial tile size in pixels
+VIEW_WIDTH = 500 # size of the grid window on screen; larger grids scroll within it
+VIEW_HEIGHT = 500
+MIN_TILE_SIZE = 8 # zoom limits, in pixels per tile
+MAX_TILE_SIZE = 100
+ZOOM_FACTOR = 1.25 # tile size change per mouse wheel step or +/- key press
+SCROLL_STEP = 3 # tiles scrolled per arrow key press
 BG_COLOR = (64,64,64)
-notifications = {0:'', 1:'Unflag tile first.', 2:'Flag limit reached.', 3:'Press r to restart or e to exit.'}
+FPS_CAP = 60 # maximum frames per second, 0 for no cap
+EVENT_DRIVEN = True # sleep in pygame.event.wait until something happens instead of polling
+TIMER_INTERVAL = 100 # ms between time label redraws while a game is running in event-driven mode
+TIMER_EVENT = USEREVENT
+SHOW_FPS = False # show frame rate and frame time in the bottom-left corner
+LOG_FPS = False # print frame rate and frame time once a second
+LOG_STARTUP = False # print how long startup and restarts take, up to their first frame on screen
+STATS_FILE = None # path to write counters and latency histograms of the session to as JSON on exit
+PROFILE_FILE = None # path to write a cProfile profile of the session to on exit
+labelCache = render.LabelCache()
+notifications = {0:'', 1:'Unflag tile first.', 2:'Flag limit reached.', 3:'Press r to restart, z to undo or e to exit.'}
 
 # game-specific
+def initializeDisplay():
+    """
+    Initialize the pygame subsystems the game uses and open the window. Call this once;
+    pygame.init() is not used since it would also start subsystems the game never needs.
+    """
+    global screen, clock, fonts
+    start = time.time()
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_caption('Minesweeper v0.1')
+    screen = pygame.display.set_mode((640,640),0,32)
+    clock = pygame.time.Clock() # also starts pygame's timer, for get_ticks
+    pygame.key.set_repeat(200, 30) # hold arrow keys to keep scrolling
+    fonts = render.FontCache(FONT_CACHE)
+    logTiming('display', start)
+
+def logTiming(name, start):
+    """
+    Print the time since start, in ms, if LOG_STARTUP is set.
+    """
+    if LOG_STARTUP:
+        print '%s: %.1f ms' % (name, (time.time() - start)*1000)
+
+def getAtlas():
+    """
+    Return the sprite atlas, loading the sprites the first time it is needed.
+    """
+    global atlas
+    if atlas is None:
+        start = time.time()
+        atlas = render.loadAtlas(SPRITES)
+        logTiming('sprites', start)
+    return atlas
+
 def initializeGame():
-    global mouseButtonStates, imageReprs, notification, b, gameOver, won, time, timeOffset
+    global mouseButtonStates, imageReprs, notification, b, view, gameOver, won, timeOffset, dirtyRects, labelTexts, labelRects
     mouseButtonStates = (False, False, False) # left, middle, right
-    imageReprs = [[None for col in xrange(10)] for row in xrange(10)]  # @UnusedVariable
+    imageReprs = {} # sprite last drawn for each visible (row, col)
     notification = notifications[0]
-    b = minesweeper.Board(NUM_ROWS_IN_GRID, NUM_COLS_IN_GRID, NUM_MINES)
+    b = minesweeper.Board(NUM_COLS_IN_GRID, NUM_ROWS_IN_GRID, NUM_MINES, safeRadius=SAFE_RADIUS)
+    b.addCellObserver(drawTiles)
+    b.addStateObserver(stateChanged)
+    view = render.Viewport(X_OFFSET, Y_OFFSET, VIEW_WIDTH, VIEW_HEIGHT, NUM_ROWS_IN_GRID, NUM_COLS_IN_GRID,
+                           RECT_SIZE, MIN_TILE_SIZE, MAX_TILE_SIZE)
     gameOver = False
     won = False
     timeOffset = 0
-    pygame.init()
+    if EVENT_DRIVEN: # the running time label is the only thing that needs periodic redraws
+        pygame.time.set_timer(TIMER_EVENT, TIMER_INTERVAL)
+    dirtyRects = [] # screen areas changed since the last display update
+    labelTexts = {} # text of each label currently on screen, by name
+    labelRects = {} # area of each label currently on screen, by name
+    screen.fill(BG_COLOR)
+    dirtyRects.append(screen.get_rect())
+    drawAllTiles()
+
+def stateChanged(state):
+    """
+    Called by the board when the game is won or lost, or back in play after an undo.
+    """
+    if state == minesweeper.PLAYING:
+        resumeGame()
+    else:
+        endGame(state)
+
+def endGame(state):
+    """
+    Redraw the tiles whose sprites change when the game ends and stop the redraw timer.
+    """
+    global gameOver, won, endTime
+    gameOver = True
+    won = state == minesweeper.WON
+    endTime = pygame.time.get_ticks()
+    drawAllTiles()
+    pygame.time.set_timer(TIMER_EVENT, 0)
+
+def resumeGame():
+    """
+    Take the result banner down and restart the clock after the move that ended the game was undone.
+    """
+    global gameOver, won, notification, timeOffset
+    gameOver = False
+    won = False
+    notification = notifications[0]
+    timeOffset += pygame.time.get_ticks() - endTime # the clock was stopped while the game was over
+    drawLabel('result', '', BIG_FONT, (0,0,0))
+    redrawGrid()
+    if EVENT_DRIVEN:
+        pygame.time.set_timer(TIMER_EVENT, TIMER_INTERVAL)
 
 def exitGame():
     pygame.quit()
     sys.exit()
 
+def tileImage(tile):
+    """
+    Return the name of the sprite that represents tile in the current game state.
+    """
+    if tile.isUncovered():
+        if tile.isMined(): # selected mined tile
+            return 'selected_mined'
+        else:
+            return uncoveredTiles[tile.getNumber()]
+    elif tile.isFlagged():
+        if gameOver and tile.isMined(): # guessed correctly
+            return 'correct'
+        else: # guessed incorrectly or game is not over
+            return 'flagged'
+    else: # tile is unturned
+        if gameOver and tile.isMined() and not won: # reveal mines when game over and lost
+            return 'mined'
+        else:
+            return 'covered'
+
+def drawTiles(indices):
+    """
+    Draw the tiles at the given board indices, or every visible tile if that is cheaper.
+    """
+    if len(indices) >= view.getNumVisibleTiles():
+        drawAllTiles()
+    else:
+        blitTiles(divmod(i, b.width) for i in indices)
+
+def drawAllTiles():
+    """
+    Draw every visible tile whose sprite changed.
+    """
+    blitTiles((row, col) for row in view.visibleRows() for col in view.visibleCols())
+
+@instrument.timed('loop.blit')
+def blitTiles(cells):
+    """
+    Blit the visible tiles among cells, a sequence of (row, col), whose sprites changed
+    since they were last drawn, all from the sprite atlas in one Surface.blits call.
+    """
+    size = view.getTileSize()
+    sprites = getAtlas()
+    sheet = sprites.getSurface(size)
+    areas = sprites.getAreas(size)
+    blits = []
+    for row, col in cells:
+        if not view.isVisible(row, col):
+            continue
+        image = tileImage(b.getTileAt(row, col))
+        if imageReprs.get((row, col)) != image:
+            imageReprs[row, col] = image
+            blits.append((sheet, view.tilePosition(row, col), areas[image]))
+    if blits:
+        screen.set_clip(view.getRect()) # tiles at the window's edges are partly hidden
+        rects = screen.blits(blits)
+        screen.set_clip(None)
+        dirtyRects.append(rects[0].unionall(rects[1:]))
+
+def redrawGrid():
+    """
+    Redraw the whole grid window after it scrolled or zoomed.
+    """
+    imageReprs.clear()
+    screen.fill(BG_COLOR, view.getRect())
+    dirtyRects.append(view.getRect())
+    drawAllTiles()
+    # the result banner sits on top of the grid, so draw it again
+    labelTexts.pop('result', None)
+    labelRects.pop('result', None)
+
+@instrument.timed('loop.label')
+def drawLabel(name, text, font, color, **position):
+    """
+    Draw the label called name with text, clearing the area its old text covered.
+    font is a (name, size[, bold]) tuple such as MED_FONT, loaded through fonts.
+    Labels are rendered through labelCache.
+    Nothing is drawn if the text is unchanged.
+    position is passed to Surface.get_rect, e.g. center=(320,600).
+    """
+    if labelTexts.get(name) == text:
+        return
+    oldRect = labelRects.pop(name, None)
+    if oldRect is not None:
+        screen.fill(BG_COLOR, oldRect)
+        dirtyRects.append(oldRect)
+    labelTexts[name] = text
+    if text != '':
+        label = labelCache.render(fonts.get(*font), text, color)
+        labelRects[name] = screen.blit(label, label.get_rect(**position))
+        dirtyRects.append(labelRects[name])
+
+def uncoverClicked(row, col):
+    """
+    Uncover the clicked tile. The board's observers redraw what it revealed.
+    """
+    global notification
+    try:
+        b.revealTileAt(row, col)
+    except minesweeper.UncoverError:
+        notification = notifications[1]
+    else:
+        notification = notifications[0]
+
+def chordClicked(row, col):
+    """
+    Chord on the clicked number, uncovering its unflagged neighbors in one batch.
+    """
+    global notification
+    if len(b.chordTileAt(row, col)):
+        notification = notifications[0]
+
+def flagClicked(row, col):
+    """
+    Flag or unflag the clicked tile.
+    """
+    global notification
+    try:
+        b.flagTileAt(row, col)
+    except minesweeper.FlagError:
+        notification = notifications[2]
+    else:
+        notification = notifications[0]
+
+def drawFrameStats():
+    """
+    Once a second, show and/or log the frame rate and the average time spent
+    working on a frame (excluding time spent waiting for events or the frame cap).
+    """
+    global frameCount, frameWorkTime, frameStatsStart
+    now = pygame.time.get_ticks()
+    if now - frameStatsStart < 1000:
+        return
+    stats = 'fps: %.1f  frame: %.2f ms  labels: %d hits %d misses' % (
+        frameCount*1000. / (now - frameStatsStart), frameWorkTime / max(frameCount, 1),
+        labelCache.getHits(), labelCache.getMisses())
+    if SHOW_FPS:
+        drawLabel('fps', stats, SMALL_FONT, (0,128,255), bottomleft=(10,630))
+    if LOG_FPS:
+        print stats
+    frameCount = 0
+    frameWorkTime = 0.
+    frameStatsStart = now
+
+if STATS_FILE or PROFILE_FILE:
+    instrument.enable(STATS_FILE, PROFILE_FILE)
+initializeDisplay()
 initializeGame()
+pendingTiming = ('first frame', startTime) # logged when its frame is on screen
+frameCount = 0
+frameWorkTime = 0. # ms spent handling events and drawing since frameStatsStart
+frameStatsStart = pygame.time.get_ticks()
 
 while True:
-    mouseButtonJustPressed = [False, False, False]
-        
-    for event in pygame.event.get():
-        if event.type == QUIT:
-            exitGame()
-        if event.type == MOUSEBUTTONDOWN:
-            mouseButtonStates = pygame.mouse.get_pressed()
-            if mouseButtonStates[0]:
-                mouseButtonJustPressed[0] = True
-            if mouseButtonStates[1]:
-                mouseButtonJustPressed[1] = True
-            if mouseButtonStates[2]:
-                mouseButtonJustPressed[2] = True
-        if event.type == KEYDOWN and gameOver:
-            if event.key == K_r:
-                initializeGame()
-                timeOffset = pygame.time.get_ticks()
-            if event.key == K_e:
+    if EVENT_DRIVEN and not dirtyRects: # anything already drawn is shown without waiting
+        events = [pygame.event.wait()] + pygame.event.get()
+    else:
+        events = pygame.event.get()
+    frameStart = time.time()
+    instrument.count('loop.frames')
+    instrument.count('loop.events', len(events))
+    with instrument.timer('loop.events'): # includes the hit-testing and blitting the events cause
+        for event in events:
+            if event.type == QUIT:
                 exitGame()
-        
-    x,y = pygame.mouse.get_pos()
-    # debugLabel = smallFont.render('mouse coords: ' + str(x) + ', ' + str(y), 1, (0,128,255))
-    screen.fill(BG_COLOR)
-    
-    for row in xrange(NUM_ROWS_IN_GRID):
-        for col in xrange(NUM_COLS_IN_GRID):
-            tile = b.getTileAt(row, col)
-            rect = Rect((X_OFFSET+RECT_SIZE*col,Y_OFFSET+RECT_SIZE*row), (RECT_SIZE,RECT_SIZE))
-            if not gameOver:
-                if rect.collidepoint(x,y) and not tile.isUncovered():
-                    if mouseButtonJustPressed[0]: # left mouse: uncover
-                        try:
-                            gameOver = b.uncoverTileAt(row, col)
-                        except minesweeper.UncoverError:
-                            notification = notifications[1]
-                        else:
-                            notification = notifications[0]
-                            if b.getNumCoveredTiles() == b.getNumMines(): # check if won
-                                gameOver = True
-                                won = True
-                    elif mouseButtonJustPressed[2]: # right mouse: flag/unflag
-                        try:
-                            b.flagTileAt(row, col)
-                        except minesweeper.FlagError:
-                            notification = notifications[2]
-                        else:
-                            notification = notifications[0]
-            if tile.isUncovered():
-                if tile.isMined(): # selected mined tile
-                    imageReprs[row][col] = selectedMinedTile
-                else:
-                    imageReprs[row][col] = uncoveredTiles[tile.getNumber()]
-            elif tile.isFlagged():
-                if gameOver and tile.isMined(): # guessed correctly
-                    imageReprs[row][col] = correctTile
-                else: # guessed incorrectly or game is not over
-                    imageReprs[row][col] = flaggedTile
-            else: # tile is unturned
-                if gameOver and tile.isMined():
-                    if won:
-                        imageReprs[row][col] = coveredTile
-                    else: # reveal mines when game over and lost
-                        imageReprs[row][col] = minedTile
-                else:
-                    imageReprs[row][col] = coveredTile
-            screen.blit(imageReprs[row][col], (rect.x,rect.y))
+            if event.type == MOUSEBUTTONDOWN:
+                mouseButtonStates = pygame.mouse.get_pressed()
+                with instrument.timer('loop.hittest'):
+                    cell = view.cellAt(*event.pos)
+                if event.button in (4, 5): # mouse wheel: zoom around the cursor
+                    if view.zoom(ZOOM_FACTOR if event.button == 4 else 1/ZOOM_FACTOR, *event.pos):
+                        redrawGrid()
+                elif not gameOver and cell is not None:
+                    if event.button == 2: # middle mouse: chord on an uncovered number
+                        chordClicked(*cell)
+                    elif not b.getTileAt(*cell).isUncovered():
+                        if event.button == 1: # left mouse: uncover
+                            uncoverClicked(*cell)
+                        elif event.button == 3: # right mouse: flag/unflag
+                            flagClicked(*cell)
+            if event.type == KEYDOWN:
+                step = SCROLL_STEP*view.getTileSize()
+                moved = False
+                if event.key == K_LEFT:
+                    moved = view.scroll(-step, 0)
+                elif event.key == K_RIGHT:
+                    moved = view.scroll(step, 0)
+                elif event.key == K_UP:
+                    moved = view.scroll(0, -step)
+                elif event.key == K_DOWN:
+                    moved = view.scroll(0, step)
+                elif event.key in (K_EQUALS, K_PLUS, K_KP_PLUS):
+                    moved = view.zoom(ZOOM_FACTOR)
+                elif event.key in (K_MINUS, K_KP_MINUS):
+                    moved = view.zoom(1/ZOOM_FACTOR)
+                if moved:
+                    redrawGrid()
+                if event.key == K_z: # undo and redo work after the game ends too
+                    b.undo()
+                elif event.key == K_y:
+                    b.redo()
+            if event.type == KEYDOWN and gameOver:
+                if event.key == K_r:
+                    pendingTiming = ('restart', time.time())
+                    initializeGame()
+                    timeOffset = pygame.time.get_ticks()
+                if event.key == K_e:
+                    exitGame()
 
     if not gameOver:
         rawTime = pygame.time.get_ticks()
-    timeLabel = medFont.render('Time: ' + `(rawTime - timeOffset)/1000.`, 1, (0,128,155))
-    screen.blit(timeLabel, (10,10))
+    drawLabel('time', 'Time: %.1f' % ((rawTime - timeOffset)/1000.), MED_FONT, (0,128,155), topleft=(10,10))
     
     if gameOver:
         if won:
-            resultLabel = bigFont.render('YOU WIN!', 1, (0,128,255))
+            drawLabel('result', 'YOU WIN!', BIG_FONT, (0,128,255), center=(320,320))
         else:
-            resultLabel = bigFont.render('GAME OVER!', 1, (255,32,0))
+            drawLabel('result', 'GAME OVER!', BIG_FONT, (255,32,0), center=(320,320))
         notification = notifications[3]
-        screen.blit(resultLabel, (320-resultLabel.get_width()/2,320-resultLabel.get_height()/2))
 
-    if notification != '':
-        notificationLabel = medFont.render(notification, 1, (0,128,255))
-        screen.blit(notificationLabel, (320-notificationLabel.get_width()/2,600-notificationLabel.get_height()/2))
+    drawLabel('notification', notification, MED_FONT, (0,128,255), center=(320,600))
     
-    pygame.display.update()
+    if SHOW_FPS or LOG_FPS:
+        drawFrameStats()
+
+    if dirtyRects:
+        with instrument.timer('loop.update'):
+            pygame.display.update(dirtyRects)
+        del dirtyRects[:]
+        if pendingTiming:
+            logTiming(*pendingTiming)
+            pendingTiming = None
+
+    frameCount += 1
+    frameWorkTime += (time.time() - frameStart)*1000
+    instrument.record('loop.frame', (time.time() - frameStart)*1e6)
+    clock.tick(FPS_CAP)
@@ -1,13 +1,34 @@
-import random
+import random, string
+from array import array
+from itertools import izip
+
+# game states of a Board
+PLAYING = 'playing'
+WON = 'won'
+LOST = 'lost'
 
 class Board(object):
     """
     A minesweeper board containing Tiles.
+    Tile state is kept in flat bytearrays indexed by row*width + col, so each
+    tile costs a few bytes instead of a full Tile object. getTileAt returns a
+    lightweight TileView onto that state.
+    The board also tracks whether the game is PLAYING, WON or LOST as moves are
+    made, and calls its observers after every move that changes tiles or the state.
+    Each move is journaled as the tiles it changed and its change to a counter,
+    so undo and redo cost as much as the move did, not a copy of the board.
     """
     
-    def __init__(self, width, height, numMines):
+    def __init__(self, width, height, numMines, mined = None, seed = None, safeRadius = None):
         """
         Initialize the board of dimensions width X height and with numMines mines.
+        If mined is given, it is a bytearray with a 1 for every mined tile and
+        is used instead of placing numMines mines at random.
+        Mines are placed with random.Random(seed) if seed is given, or the random module otherwise.
+        If safeRadius is given, mines are only placed when the first tile is uncovered,
+        and never within safeRadius tiles of it: 0 keeps just that tile safe, 1 also
+        keeps its neighbors safe so the first click always opens a region. There must
+        then be fewer mines than tiles.
         """
         self.width = width
         self.height = height
@@ -15,89 +36,190 @@ class Board(object):
         self.numMines = numMines
         self.numCoveredTiles = self.numTiles
         self.numFlaggedTiles = 0
-        self.tiles = [[Tile(row, col) for col in range(width)] for row in range(height)]
+        self.uncovered = bytearray(self.numTiles) # 1 if tile has been turned over
+        self.flagged = bytearray(self.numTiles) # 1 if tile has been flagged
         
-        # populate board with numMines mines
-        mines = random.sample(xrange(self.numTiles), self.numMines)
-        for i in mines:
-            self.tiles[i / self.width][i % self.width].setMine()
+        self.rng = random if seed is None else random.Random(seed)
+        self.safeRadius = safeRadius
+        self.state = PLAYING
+        self.cellObservers = [] # called with the indices of the tiles each move changes
+        self.stateObservers = [] # called with the new state when the game is won or lost
+        self.history = [] # moves made, as (action, changed indices, counter change, old state, new state)
+        self.future = [] # moves undone, most recently undone last
         
-        # assign numbers
-        for row in self.tiles:
-            for mine in row:
-                number = 0
-                if mine.getRow() > 0: # check above
-                    number += self.tiles[mine.getRow()-1][mine.getCol()].isMined()
-                    if mine.getCol() > 0: # check upper-left
-                        number += self.tiles[mine.getRow()-1][mine.getCol()-1].isMined()
-                    if mine.getCol() < self.width-1: # check upper-right
-                        number += self.tiles[mine.getRow()-1][mine.getCol()+1].isMined()
-                if mine.getRow() < self.height-1: # check below
-                    number += self.tiles[mine.getRow()+1][mine.getCol()].isMined()
-                    if mine.getCol() > 0: # check lower-left
-                        number += self.tiles[mine.getRow()+1][mine.getCol()-1].isMined()
-                    if mine.getCol() < self.width-1: # check lower-right
-                        number += self.tiles[mine.getRow()+1][mine.getCol()+1].isMined()
-                if mine.getCol() > 0: # check left
-                    number += self.tiles[mine.getRow()][mine.getCol()-1].isMined()
-                if mine.getCol() < self.width-1: # check right
-                    number += self.tiles[mine.getRow()][mine.getCol()+1].isMined()
-                mine.setNumber(number)
+        if mined is not None:
+            if len(mined) != self.numTiles:
+                raise ValueError('mined must have one entry per tile')
+            self.mined = bytearray(mined) # 1 if mine is on tile
+            self.numbers = countNeighbors(self.mined, self.width, self.height) # number of neighboring mines
+            self.minesPlaced = True
+        elif safeRadius is None:
+            self.placeMines()
+        else: # wait for the first uncover to place mines
+            if numMines >= self.numTiles: # the first tile uncovered is always kept free
+                raise ValueError('Cannot place ' + str(numMines) + ' mines on ' + str(self.numTiles - 1) + ' tiles')
+            self.mined = bytearray(self.numTiles)
+            self.numbers = bytearray(self.numTiles)
+            self.minesPlaced = False
+
+    def placeMines(self, safe = ()):
+        """
+        Populate board with numMines mines, none of them on the tile indices in safe, and assign numbers.
+        A sparse board is built from the mines' indices, so beyond allocating its arrays
+        it costs O(numMines) rather than a pass over every tile.
+        """
+        if self.numMines*SPARSE_RATIO <= self.numTiles - len(safe):
+            mines = generateMineIndices(self.width, self.height, self.numMines, self.rng, safe)
+            self.mined = bytearray(self.numTiles)
+            for i in mines:
+                self.mined[i] = 1
+            self.numbers = countNeighborsOf(mines, self.width, self.height)
+        else:
+            self.mined = generateMines(self.width, self.height, self.numMines, self.rng, safe)
+            self.numbers = countNeighbors(self.mined, self.width, self.height)
+        self.minesPlaced = True
+
+    def getRegion(self, row, col, radius):
+        """
+        Return the indices of the tiles at most radius rows and columns away from row, col.
+        """
+        return [r*self.width + c
+                for r in xrange(max(row-radius, 0), min(row+radius+1, self.height))
+                for c in xrange(max(col-radius, 0), min(col+radius+1, self.width))]
 
     def uncoverTileAt(self, row, col):
         """
         Uncover a tile at row 'row' and col 'col'.
         Assume row and col are ints.
-        Raise an IndexError if row is not within range(self.width) and col not within range(self.height)
+        Raise an IndexError if row is not within range(self.height) or col not within range(self.width)
         Otherwise raise an UncoverError if tile has already been uncovered.
         Return False if tile is flagged or turned.
         Return True if tile is mined, False if tile is not mined.
         """
-        if not row in range(self.width) or not col in range(self.height):
-            raise IndexError()
-        tile = self.tiles[row][col]
-        if tile.isFlagged(): # check if tile is currently flagged
+        self.revealTileAt(row, col)
+        return self.mined[row*self.width + col] == 1
+
+    def revealTileAt(self, row, col):
+        """
+        Uncover a tile at row 'row' and col 'col' the same way uncoverTileAt does,
+        flood-filling outwards from it if its number is 0.
+        Raise the same errors as uncoverTileAt.
+        Return an array of the indices (row*width + col) of the newly uncovered tiles.
+        """
+        i = self.checkBounds(row, col)
+        if self.flagged[i]: # check if tile is currently flagged
             raise UncoverError('Tile is flagged. Unflag this tile first.')
+        state = self.state
+        revealed = array('l')
+        self.revealIndex(i, revealed)
+        self.endMove('u', revealed, -len(revealed), state)
+        return revealed
 
-        if not tile.isUncovered():
-            # only decrement number of covered tiles if tile has not been uncovered yet
-            self.numCoveredTiles -= 1
-        res = tile.uncover()
-        canUncoverNumbers = tile.getNumber()==0
-        if tile.getNumber() == 0 and not tile.isMined(): # only check adjacent tiles if this tile's number is 0 and this tile isn't mined
-            if row > 0: # check above
-                above = self.tiles[row-1][col]
-                if not above.isUncovered():
-                    # print 'Checking above' # DEBUG
-                    self.uncoverTile(above, canUncoverNumbers)
-            if row < self.height-1: # check below
-                below = self.tiles[row+1][col]
-                if not below.isUncovered():
-                    # print 'Checking below' # DEBUG
-                    self.uncoverTile(below, canUncoverNumbers)
+    def uncoverMany(self, rows, cols):
+        """
+        Uncover the tiles at rows[k], cols[k] in order, as revealTileAt does for each.
+        rows and cols are equal-length sequences of ints, such as arrays or lists.
+        All coordinates are validated before anything is uncovered: raise an IndexError
+        if any is off the board. Raise an UncoverError on reaching a flagged tile.
+        Stop after uncovering a mined tile, since the game is then over.
+        Return an array of the indices of all the newly uncovered tiles.
+        """
+        indices = self.checkBoundsMany(rows, cols)
+        state = self.state
+        flagged = self.flagged
+        revealed = array('l')
+        try:
+            for i in indices:
+                if flagged[i]:
+                    raise UncoverError('Tile is flagged. Unflag this tile first.')
+                self.revealIndex(i, revealed)
+                if self.mined[i]: # mines may only have been placed by this reveal
+                    break
+        finally:
+            self.endMove('u', revealed, -len(revealed), state)
+        return revealed
+
+    def chordTileAt(self, row, col):
+        """
+        Chord on the tile at row 'row' and col 'col': if it is an uncovered number with
+        exactly that many flagged neighbors, uncover all of its other covered neighbors,
+        flood-filling from them as revealTileAt does. A misplaced flag means a mined
+        neighbor is uncovered too; the rest of the chord still goes ahead.
+        Raise an IndexError if the tile is off the board.
+        Return an array of the indices of the newly uncovered tiles, empty if nothing changed.
+        """
+        i = self.checkBounds(row, col)
+        revealed = array('l')
+        if not self.uncovered[i] or self.mined[i] or self.numbers[i] == 0:
+            return revealed
+        neighbors = self.getNeighbors(i)
+        uncovered, flagged = self.uncovered, self.flagged
+        if sum(flagged[j] for j in neighbors) != self.numbers[i]:
+            return revealed
+        state = self.state
+        for j in neighbors:
+            if not uncovered[j] and not flagged[j]:
+                self.revealIndex(j, revealed)
+        self.endMove('u', revealed, -len(revealed), state)
+        return revealed
+
+    def revealIndex(self, i, revealed):
+        """
+        Uncover the tile at index i and flood-fill outwards from it if its number is 0,
+        appending the indices of the newly uncovered tiles to the array revealed,
+        and update the game state. Observers are left for the caller to notify.
+        Assume i is on the board and not flagged.
+        """
+        start = len(revealed)
+        if not self.minesPlaced:
+            row, col = divmod(i, self.width)
+            safe = self.getRegion(row, col, self.safeRadius)
+            if self.numMines > self.numTiles - len(safe): # too crowded to keep the whole region clear
+                safe = [i]
+            self.placeMines(safe)
+
+        width = self.width
+        last = self.numTiles - width # index of the first tile in the bottom row
+        mined, uncovered, flagged, numbers = self.mined, self.uncovered, self.flagged, self.numbers
+        if not uncovered[i]:
+            uncovered[i] = 1
+            revealed.append(i)
+            if mined[i] and self.state == PLAYING:
+                self.state = LOST
+        # only check adjacent tiles if this tile's number is 0 and this tile isn't mined
+        stack = [i] if numbers[i] == 0 and not mined[i] else []
+        while stack:
+            i = stack.pop()
+            col = i % width
+            neighbors = []
+            if i >= width: # check above
+                neighbors.append(i-width)
+            if i < last: # check below
+                neighbors.append(i+width)
             if col > 0: # check left
-                left = self.tiles[row][col-1]
-                if not left.isUncovered():
-                    # print 'Checking left'# DEBUG
-                    self.uncoverTile(left, canUncoverNumbers)
-            if col < self.width-1: # check right
-                right = self.tiles[row][col+1]
-                if not right.isUncovered():
-                    # print 'Checking right' # DEBUG
-                    self.uncoverTile(right, canUncoverNumbers)
-        return res
+                neighbors.append(i-1)
+            if col < width-1: # check right
+                neighbors.append(i+1)
+            for j in neighbors:
+                if not uncovered[j] and not mined[j] and not flagged[j]:
+                    uncovered[j] = 1
+                    revealed.append(j)
+                    if numbers[j] == 0:
+                        stack.append(j)
+        # only newly uncovered tiles decrement the number of covered tiles
+        self.numCoveredTiles -= len(revealed) - start
+        if self.state == PLAYING and self.numCoveredTiles == self.numMines:
+            self.state = WON # only mined tiles are left covered
 
     def uncoverTile(self, tile, canUncoverNumbers):
         """
         Uncover tile if tile's number is 0 or canUncoverNumbers is True.
         The tile cannot be mined if it's to be uncovered.
-        Assume tile is a Tile.
-        Used as a helper method to call uncoverTileAt recursively.
+        Assume tile is a TileView.
+        Kept for compatibility; uncoverTileAt no longer recurses through it.
         """
-        # print 'Number:', tile.getNumber() # DEBUG
         if (tile.getNumber() == 0 or canUncoverNumbers) and not tile.isMined() and not tile.isFlagged():
             # only call if tile's number is 0 or canUncoverNumbers is true, and tile isn't mined
-            # print 'Uncover' # DEBUG
             self.uncoverTileAt(tile.getRow(), tile.getCol())
 
     def uncoverAllTiles(self):
@@ -105,36 +227,223 @@ class Board(object):
         DEPRECATED METHOD
         Uncover all mined tiles when game is over.
         """
-        for row in self.tiles:
-            for tile in row:
-                if tile.isMined():
-                    tile.uncover()
+        changed = array('l')
+        for i in xrange(self.numTiles):
+            if self.mined[i] and not self.uncovered[i]:
+                self.uncovered[i] = 1
+                changed.append(i)
+        self.endMove('u', changed, 0, self.state)
     
     def flagTileAt(self, row, col):
         """
         Flag/unflag tile at row 'row' and col 'col'.
-        Assume row and col are ints, and checked is a list of Tiles.
-        Raise an IndexError if row is not within range(self.width) and col not within range(self.height)
+        Assume row and col are ints.
+        Raise an IndexError if row is not within range(self.height) or col not within range(self.width)
         Otherwise raise a FlagError if self.numFlaggedTiles will exceed self.numMines
         """
-        if not row in range(self.width) or not col in range(self.height):
-            raise IndexError()
-        tile = self.tiles[row][col]
-        if not tile.isFlagged() and self.numFlaggedTiles >= self.numMines:
+        i = self.checkBounds(row, col)
+        if not self.flagged[i] and self.numFlaggedTiles >= self.numMines:
             # if number of flagged tiles will exceed number of mines
             raise FlagError('Too many flags. Max number of flags is ' + str(self.numMines))
         
-        tile.changeFlag()
-        if tile.isFlagged(): # if tile is now flagged
+        self.flagged[i] ^= 1
+        if self.flagged[i]: # if tile is now flagged
             self.numFlaggedTiles += 1 # increment number of flagged tiles
         else: # if tile is now not flagged
             self.numFlaggedTiles -= 1 # decrement number of flagged tiles
+        self.endMove('f', array('l', [i]), 1 if self.flagged[i] else -1, self.state)
+
+    def flagMany(self, rows, cols):
+        """
+        Flag/unflag the tiles at rows[k], cols[k] in order, as flagTileAt does for each.
+        rows and cols are equal-length sequences of ints, such as arrays or lists.
+        All coordinates are validated before anything is flagged: raise an IndexError
+        if any is off the board. Raise a FlagError on reaching a flag that would exceed
+        self.numMines, keeping the flags placed before it.
+        """
+        indices = self.checkBoundsMany(rows, cols)
+        flagged, numMines = self.flagged, self.numMines
+        numFlagged = start = self.numFlaggedTiles
+        changed = array('l')
+        try:
+            for i in indices:
+                if flagged[i]:
+                    flagged[i] = 0
+                    numFlagged -= 1
+                elif numFlagged >= numMines:
+                    raise FlagError('Too many flags. Max number of flags is ' + str(numMines))
+                else:
+                    flagged[i] = 1
+                    numFlagged += 1
+                changed.append(i)
+        finally:
+            self.numFlaggedTiles = numFlagged
+            self.endMove('f', changed, numFlagged - start, self.state)
+
+    def undo(self):
+        """
+        Take back the last move, covering or unflagging again the tiles it changed and
+        restoring the counters and state from before it. This costs as much as the
+        number of tiles the move changed. Mines placed by the first uncover stay placed.
+        Return an array of the indices of the tiles changed back, or None if there is no move to undo.
+        """
+        if not self.history:
+            return None
+        move = self.history.pop()
+        action, changed, delta, oldState, newState = move
+        if action == 'u':
+            uncovered = self.uncovered
+            for i in changed:
+                uncovered[i] = 0
+            self.numCoveredTiles -= delta
+        else: # flags are toggled, so toggling the same tiles again reverts them
+            flagged = self.flagged
+            for i in changed:
+                flagged[i] ^= 1
+            self.numFlaggedTiles -= delta
+        self.state = oldState
+        self.future.append(move)
+        self.notify(changed, newState)
+        return changed
+
+    def redo(self):
+        """
+        Make the last undone move again. Any new move forgets the undone moves.
+        Return an array of the indices of the tiles it changed, or None if there is no move to redo.
+        """
+        if not self.future:
+            return None
+        move = self.future.pop()
+        action, changed, delta, oldState, newState = move
+        if action == 'u':
+            uncovered = self.uncovered
+            for i in changed:
+                uncovered[i] = 1
+            self.numCoveredTiles += delta
+        else:
+            flagged = self.flagged
+            for i in changed:
+                flagged[i] ^= 1
+            self.numFlaggedTiles += delta
+        self.state = newState
+        self.history.append(move)
+        self.notify(changed, oldState)
+        return changed
+
+    def rollback(self, numMoves):
+        """
+        Undo moves until only the first numMoves are left, e.g. to abandon a branch
+        of a what-if search that started when getNumMoves() was numMoves.
+        """
+        while len(self.history) > numMoves:
+            self.undo()
+
+    def endMove(self, action, changed, delta, oldState):
+        """
+        Journal a move, 'u' to uncover or 'f' to flag/unflag, that changed the tiles at
+        indices changed and numCoveredTiles or numFlaggedTiles by delta and was made
+        in state oldState, then tell the observers about it.
+        """
+        if len(changed):
+            self.history.append((action, changed, delta, oldState, self.state))
+            del self.future[:]
+        self.notify(changed, oldState)
+
+    def addCellObserver(self, callback):
+        """
+        Call callback with an array of the indices of the tiles changed by every
+        move from now on, once per move, so Solver.update can subscribe directly.
+        """
+        self.cellObservers.append(callback)
+
+    def removeCellObserver(self, callback):
+        self.cellObservers.remove(callback)
+
+    def addStateObserver(self, callback):
+        """
+        Call callback with the new state when the game is won or lost, or when
+        undo or redo changes the state, after the cell observers have seen the move.
+        """
+        self.stateObservers.append(callback)
+
+    def removeStateObserver(self, callback):
+        self.stateObservers.remove(callback)
+
+    def notify(self, changed, oldState):
+        """
+        Tell the observers about a move, undo or redo that changed the tiles at indices
+        changed and started in state oldState.
+        """
+        if len(changed):
+            for callback in self.cellObservers:
+                callback(changed)
+        if self.state != oldState:
+            for callback in self.stateObservers:
+                callback(self.state)
+
+    def updateState(self):
+        """
+        Recompute the game state from the tile arrays, for boards whose arrays were set
+        directly rather than through moves. Observers are not notified.
+        """
+        mined, uncovered = self.mined, self.uncovered
+        self.state = PLAYING
+        i = mined.find('\x01')
+        while i != -1:
+            if uncovered[i]:
+                self.state = LOST
+                return
+            i = mined.find('\x01', i+1)
+        if self.minesPlaced and self.numCoveredTiles == self.numMines:
+            self.state = WON
+
+    def checkBounds(self, row, col):
+        """
+        Return the index of the tile at row 'row' and col 'col'.
+        Raise an IndexError if it is off the board.
+        """
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise IndexError('Tile (' + str(row) + ', ' + str(col) + ') is off the board')
+        return row*self.width + col
+
+    def checkBoundsMany(self, rows, cols):
+        """
+        Return an array of the indices of the tiles at rows[k], cols[k].
+        The bounds are checked on the whole of rows and cols at once, with min and max,
+        rather than per tile. Raise an IndexError if any tile is off the board, or a
+        ValueError if rows and cols differ in length.
+        """
+        if len(rows) != len(cols):
+            raise ValueError('rows and cols must have the same length')
+        if len(rows) and (min(rows) < 0 or max(rows) >= self.height or
+                          min(cols) < 0 or max(cols) >= self.width):
+            raise IndexError('Tile coordinates are off the board')
+        width = self.width
+        return array('l', [row*width + col for row, col in izip(rows, cols)])
 
     def getTileAt(self, row, col):
         """
-        Return tile at row 'row' and col 'col'
+        Return a TileView of the tile at row 'row' and col 'col'
         """
-        return self.tiles[row][col]
+        if row < 0:
+            row += self.height
+        if col < 0:
+            col += self.width
+        if not 0 <= row < self.height or not 0 <= col < self.width:
+            raise IndexError('Tile index out of range')
+        return TileView(self, row, col)
+
+    def getNeighbors(self, i):
+        """
+        Return the indices of the (up to eight) tiles adjacent to the tile at index i.
+        """
+        row, col = divmod(i, self.width)
+        res = []
+        for r in xrange(max(row-1, 0), min(row+2, self.height)):
+            for c in xrange(max(col-1, 0), min(col+2, self.width)):
+                if r != row or c != col:
+                    res.append(r*self.width + c)
+        return res
     
     def getNumTiles(self):
         return self.numTiles
@@ -148,36 +457,248 @@ class Board(object):
     def getNumFlaggedTiles(self):
         return self.numFlaggedTiles
 
+    def getState(self):
+        return self.state
+
+    def getNumMoves(self):
+        return len(self.history)
+
     def getMined(self):
         """
         DEBUG METHOD
         Return board with mine states.
         """
-        res = 'Mines\n'
-        for row in self.tiles:
-            for mine in row:
-                if mine.isMined():
-                    res += 'X'
-                else:
-                    res += str(mine.getNumber())
-            res += '\n'
-        return res
+        res = ['Mines\n']
+        for row in xrange(self.height):
+            start = row*self.width
+            res.append(''.join(['X' if self.mined[i] else str(self.numbers[i])
+                                for i in xrange(start, start+self.width)]))
+            res.append('\n')
+        return ''.join(res)
+
+    def tileString(self, i, gameOver = False):
+        """
+        Return the character representing the tile at index i.
+        """
+        if self.uncovered[i]:
+            if self.mined[i]:
+                return '!'
+            else:
+                return str(self.numbers[i])
+        elif self.flagged[i]:
+            if gameOver:
+                if self.mined[i]: # guessed correctly
+                    return 'X'
+                else: # guessed incorrectly
+                    return 'P'
+            else:
+                return 'P'
+        else: # unturned
+            if gameOver and self.mined[i]: # reveal mines when game over
+                return '!'
+            else:
+                return 'Q'
 
     def __str__(self, gameOver = False):
-        res = ''
+        res = []
         if gameOver:
-            res += 'GAME OVER\n'
-        res += '-'*self.width + '\n'
-        for row in self.tiles:
-            for tile in row:
-                res += tile.__str__(gameOver)
-            res += '\n'
-        return res
+            res.append('GAME OVER\n')
+        res.append('-'*self.width + '\n')
+        for row in xrange(self.height):
+            start = row*self.width
+            res.append(''.join([self.tileString(i, gameOver) for i in xrange(start, start+self.width)]))
+            res.append('\n')
+        return ''.join(res)
+
+
+class TileView(object):
+    """
+    A lightweight view of one tile of a Board.
+    Has the same interface as Tile; reads and writes go through to the board's arrays.
+    """
+    __slots__ = ('board', 'row', 'col', 'index')
+
+    def __init__(self, board, row, col):
+        self.board = board
+        self.row = row
+        self.col = col
+        self.index = row*board.width + col
+
+    def setMine(self):
+        """
+        Set mine on tile.
+        """
+        self.board.mined[self.index] = 1
+
+    def setNumber(self, number):
+        """
+        Set number of surrounding mines.
+        Assume number is an int.
+        """
+        self.board.numbers[self.index] = number
+
+    def uncover(self):
+        """
+        Uncover this tile.
+        Return True if tile is mined, False if tile isn't mined.
+        """
+        self.board.uncovered[self.index] = 1
+        return self.isMined()
+
+    def changeFlag(self):
+        """
+        Flag this tile if it is not flagged, unflag it otherwise.
+        """
+        self.board.flagged[self.index] ^= 1
+
+    def getRow(self):
+        return self.row
+
+    def getCol(self):
+        return self.col
+
+    def isUncovered(self):
+        return self.board.uncovered[self.index] == 1
+
+    def isMined(self):
+        return self.board.mined[self.index] == 1
+
+    def isFlagged(self):
+        return self.board.flagged[self.index] == 1
+
+    def getNumber(self):
+        return self.board.numbers[self.index]
+
+    def __eq__(self, other):
+        if not isinstance(other, (TileView, Tile)):
+            return False
+        return (self.row == other.getRow() and self.col == other.getCol() and
+                self.getNumber() == other.getNumber() and self.isMined() == other.isMined())
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __str__(self, gameOver = False):
+        return self.board.tileString(self.index, gameOver)
+
+
+# placeMines builds boards with at most one mine per SPARSE_RATIO free tiles from their
+# mines' indices; past that, countNeighbors' pass over every tile is cheaper
+SPARSE_RATIO = 1024
+
+
+def generateMineIndices(width, height, numMines, rng = random, safe = ()):
+    """
+    Return a list of numMines distinct tile indices chosen at random, none of them
+    in safe. rng is a random.Random or the random module.
+    Mines are drawn one at a time until numMines distinct tiles are chosen, so a sparse
+    board takes O(numMines) time and memory whatever its size. For boards over half mined
+    the free tiles are drawn instead, which costs O(numTiles).
+    A given rng state chooses the same tiles as generateMines.
+    """
+    numTiles = width * height
+    safe = set(safe)
+    numFree = numTiles - len(safe)
+    if not 0 <= numMines <= numFree:
+        raise ValueError('Cannot place ' + str(numMines) + ' mines on ' + str(numFree) + ' tiles')
+    if numMines > numFree // 2:
+        mined = generateMines(width, height, numMines, rng, safe)
+        return [i for i in xrange(numTiles) if mined[i]]
+    draw = rng.random
+    mines = []
+    chosen = set()
+    while len(mines) < numMines:
+        i = int(draw()*numTiles)
+        if i not in chosen and i not in safe:
+            chosen.add(i)
+            mines.append(i)
+    return mines
+
+
+def generateMines(width, height, numMines, rng = random, safe = ()):
+    """
+    Return a bytearray with a 1 on each of numMines tiles chosen at random, none of
+    them at the tile indices in safe. rng is a random.Random or the random module.
+    It draws the same tiles as generateMineIndices, checking for repeats in the bytearray
+    rather than a set, which is faster on dense boards but makes this O(numTiles);
+    for boards over half mined the free tiles are drawn instead.
+    """
+    numTiles = width * height
+    safe = set(safe)
+    numFree = numTiles - len(safe)
+    if not 0 <= numMines <= numFree:
+        raise ValueError('Cannot place ' + str(numMines) + ' mines on ' + str(numFree) + ' tiles')
+    draw = rng.random # int(draw()*numTiles) is a much cheaper randrange(numTiles)
+    if numMines <= numFree // 2:
+        mined = bytearray(numTiles)
+        placed = 0
+        while placed < numMines:
+            i = int(draw()*numTiles)
+            if not mined[i] and i not in safe:
+                mined[i] = 1
+                placed += 1
+    else:
+        mined = bytearray('\x01')*numTiles
+        for i in safe:
+            mined[i] = 0
+        cleared = 0
+        while cleared < numFree - numMines:
+            i = int(draw()*numTiles)
+            if mined[i]:
+                mined[i] = 0
+                cleared += 1
+    return mined
+
+
+def countNeighbors(mined, width, height):
+    """
+    Return a bytearray holding the number of mined neighbors of every tile.
+    Assume mined is a bytearray of 0s and 1s indexed by row*width + col.
+    The board is packed into one big integer with a hex digit per tile (and a
+    zero digit padding the end of each row), so the eight neighbor sums become
+    a few shifted big-integer additions instead of a Python loop per tile.
+    """
+    if width == 0 or height == 0:
+        return bytearray(width*height)
+    stride = width + 1
+    digits = bytearray('0'*(stride*height))
+    flat = str(mined).translate(_BYTES_TO_HEX)
+    for row in xrange(height):
+        digits[row*stride:row*stride+width] = flat[row*width:(row+1)*width]
+    packed = int(str(digits), 16)
+    rows = packed + (packed << 4) + (packed >> 4) # tile plus left and right neighbors
+    counts = rows + (rows << 4*stride) + (rows >> 4*stride) - packed # plus rows above and below, minus tile
+    counts &= (1 << 4*len(digits)) - 1 # drop digits shifted above the first row
+    digits = ('%0*x' % (len(digits), counts)).translate(_HEX_TO_BYTES)
+    res = bytearray(width*height)
+    for row in xrange(height):
+        res[row*width:(row+1)*width] = digits[row*stride:row*stride+width]
+    return res
+
+_BYTES_TO_HEX = string.maketrans('\x00\x01', '01')
+_HEX_TO_BYTES = string.maketrans('012345678', ''.join(map(chr, xrange(9))))
+
+
+def countNeighborsOf(mines, width, height):
+    """
+    Return a bytearray holding the number of mined neighbors of every tile, given the
+    indices of the mined tiles. Only the mines' neighbors are visited, so on a sparse
+    board this is much cheaper than countNeighbors.
+    """
+    res = bytearray(width*height)
+    for i in mines:
+        row, col = divmod(i, width)
+        for r in xrange(max(row-1, 0), min(row+2, height)):
+            for j in xrange(r*width + max(col-1, 0), r*width + min(col+2, width)):
+                res[j] += 1
+        res[i] -= 1
+    return res
 
 
 class Tile(object):
     """
-    A Tile on the Board.
+    A standalone Tile object, as used by the original list-of-lists board layout.
+    Board itself now hands out TileViews, which share this interface.
     """
     
     def __init__(self, row, col):
@@ -384,10 +905,8 @@ def testBoard3():
 
 # GAME LOOP
 if __name__ == '__main__':
-    b = Board(10,10,10) # change as necessary
-    gameOver = False
-    won = False
-    while not gameOver:
+    b = Board(10,10,10, safeRadius = 1) # change as necessary
+    while b.getState() == PLAYING:
         print b
         try:
             row = int(raw_input('Enter the row of the tile you wish to select. '))
@@ -403,14 +922,6 @@ if __name__ == '__main__':
                     print 'The tile you specified is out of bounds.'
                 except UncoverError:
                     print 'The tile you specified is flagged. Please unflag this tile first.'
-                else:
-                    if b.getTileAt(row, col).isMined(): # if selected tile is mined, game over
-                        gameOver = True
-                        won = False
-                    elif b.getNumCoveredTiles() == b.getNumMines():
-                        # if number of remaining tiles == number of mines, player wins
-                        gameOver = True
-                        won = True
             elif action == 'f': # flag tile
                 try:
                     b.flagTileAt(row, col)
@@ -421,7 +932,7 @@ if __name__ == '__main__':
             else:
                 print 'Action not understood.'
     print b.__str__(True)
-    if won:
+    if b.getState() == WON:
         print 'YOU WON!'
     else:
         print 'You lost.'
@@ -0,0 +1,195 @@
+"""
+Exact mine probabilities for the covered tiles of a Board, for when the solver's
+deterministic rules run out.
+
+The constraints tracked by a solver.Solver are split into independent components.
+Each component's mine layouts are counted by how many mines they use, and the counts
+are combined with the mines left over for the unconstrained tiles, weighted by the
+number of ways of placing those mines. Products of layout counts soon outgrow a float
+on a large board, so every combined distribution is scaled to a largest weight of 1;
+only ratios between weights matter.
+"""
+
+import math
+from collections import OrderedDict
+import solver
+
+
+class ProbabilityEngine(object):
+    """
+    Computes the probability that each covered tile of a solver's board is mined.
+    Component results are memoized by their constraints, so only components changed
+    since the last query are enumerated again.
+    Components with more than maxComponentSize tiles are too big to enumerate, and
+    their tiles are treated as unconstrained.
+    """
+
+    def __init__(self, solver, maxComponentSize = 20, cacheSize = 1024):
+        self.solver = solver
+        self.board = solver.board
+        self.maxComponentSize = maxComponentSize
+        self.cacheSize = cacheSize
+        self.components = OrderedDict() # constraint signature -> (cells, solutions), least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def enumerate(self, constraints):
+        """
+        Return enumerateComponent(constraints), memoized by the constraints' signature.
+        """
+        signature = frozenset(constraints)
+        res = self.components.pop(signature, None)
+        if res is None:
+            self.misses += 1
+            res = solver.enumerateComponent(constraints, self.maxComponentSize)
+            if len(self.components) >= self.cacheSize:
+                self.components.popitem(last=False)
+        else:
+            self.hits += 1
+        self.components[signature] = res
+        return res
+
+    def getProbabilities(self):
+        """
+        Return (probabilities, other): a dict mapping the index of every constrained
+        covered tile to its probability of being mined, and the probability of
+        every other unknown covered tile.
+        Tiles the solver has already deduced are not included; they are 0 or 1.
+        """
+        s = self.solver
+        s.analyze()
+        frontier = []
+        distributions = []
+        seen = set()
+        for i in s.constraints:
+            if i in seen:
+                continue
+            component = s.component(i)
+            seen.update(component)
+            cells, solutions = self.enumerate([s.constraints[j] for j in component])
+            if solutions:
+                frontier.append((cells, solutions))
+                distributions.append(normalize(dict((k, n) for k, (n, counts) in solutions.iteritems())))
+        numFrontier = sum(len(cells) for cells, solutions in frontier)
+        # the solver's mines are never flagged, so no mine is counted twice here
+        numOther = (self.board.getNumCoveredTiles() - self.board.getNumFlaggedTiles() -
+                    len(s.mines) - len(s.safe) - numFrontier)
+        minesLeft = self.board.getNumMines() - self.board.getNumFlaggedTiles() - len(s.mines)
+
+        # prefix[j] and suffix[j] combine the components before and after component j
+        prefix = [{0: 1.}]
+        for d in distributions:
+            prefix.append(normalize(convolve(prefix[-1], d)))
+        suffix = [{0: 1.}]
+        for d in reversed(distributions):
+            suffix.append(normalize(convolve(suffix[-1], d)))
+        suffix.reverse()
+        weights = binomialWeights(numOther, minesLeft)
+
+        total = 0.
+        otherMines = 0.
+        for k, n in prefix[-1].iteritems():
+            w = n * weights.get(k, 0.)
+            total += w
+            otherMines += w * (minesLeft - k)
+        if total == 0: # the constraints contradict the mine count, e.g. after a wrong flag
+            return {}, min(max(float(minesLeft) / max(numOther, 1), 0.), 1.)
+
+        probabilities = {}
+        for j, (cells, solutions) in enumerate(frontier):
+            rest = normalize(convolve(prefix[j], suffix[j+1]))
+            # rest is scaled differently from prefix[-1], so weigh against this component's own total
+            componentTotal = 0.
+            mines = [0.]*len(cells)
+            for k, (n, counts) in solutions.iteritems():
+                w = sum(m * weights.get(k + r, 0.) for r, m in rest.iteritems())
+                if w:
+                    componentTotal += n * w
+                    for c in xrange(len(cells)):
+                        mines[c] += counts[c] * w
+            for cell, m in zip(cells, mines):
+                probabilities[cell] = m / componentTotal if componentTotal else 0.
+        other = otherMines / total / numOther if numOther > 0 else 0.
+        return probabilities, other
+
+    def getProbabilityAt(self, row, col):
+        """
+        Return the probability that the tile at row, col is mined.
+        """
+        i = row*self.board.width + col
+        self.solver.analyze()
+        if self.board.uncovered[i]:
+            return 0.
+        if self.board.flagged[i] or i in self.solver.mines:
+            return 1.
+        if i in self.solver.safe:
+            return 0.
+        probabilities, other = self.getProbabilities()
+        return probabilities.get(i, other)
+
+    def getSafestTile(self):
+        """
+        Return the (row, col) of the covered tile least likely to be mined, or None if there is none.
+        """
+        if self.solver.getSafeTiles():
+            return self.solver.getHint()
+        probabilities, other = self.getProbabilities()
+        best = min(probabilities, key=probabilities.get) if probabilities else None
+        if best is None or other < probabilities[best]:
+            # a tile with probability other is safer: an unconstrained tile or one in a component
+            # too big to enumerate; pick the first one
+            board = self.board
+            for i in xrange(board.getNumTiles()):
+                if (not board.uncovered[i] and not board.flagged[i] and i not in self.solver.mines and
+                        i not in probabilities):
+                    return divmod(i, board.width)
+        return None if best is None else divmod(best, self.board.width)
+
+    def getHits(self):
+        return self.hits
+
+    def getMisses(self):
+        return self.misses
+
+
+def convolve(a, b):
+    """
+    Combine two distributions of mine counts, dicts mapping a number of mines to a number of layouts.
+    """
+    res = {}
+    for i, m in a.iteritems():
+        for j, n in b.iteritems():
+            res[i + j] = res.get(i + j, 0) + m*n
+    return res
+
+
+def normalize(distribution):
+    """
+    Return distribution, a dict mapping a number of mines to a weight, as floats scaled so the largest weight is 1.
+    """
+    top = max(distribution.itervalues()) if distribution else 0
+    if not top:
+        return dict((k, 0.) for k in distribution)
+    return dict((k, float(n) / top) for k, n in distribution.iteritems())
+
+
+_binomialWeights = OrderedDict()
+
+def binomialWeights(n, m, cacheSize = 256):
+    """
+    Return a dict mapping k to the number of ways of placing the m - k mines not in
+    the frontier on the n other tiles, C(n, m - k), scaled by a common factor so
+    the largest weight is 1. Results are cached.
+    """
+    key = (n, m)
+    weights = _binomialWeights.pop(key, None)
+    if weights is None:
+        logs = {}
+        for k in xrange(max(0, m - n), m + 1):
+            logs[k] = math.lgamma(n + 1) - math.lgamma(m - k + 1) - math.lgamma(n - m + k + 1)
+        top = max(logs.itervalues()) if logs else 0.
+        weights = dict((k, math.exp(l - top)) for k, l in logs.iteritems())
+        if len(_binomialWeights) >= cacheSize:
+            _binomialWeights.popitem(last=False)
+    _binomialWeights[key] = weights
+    return weights
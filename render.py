@@ -0,0 +1,276 @@
+"""
+Rendering helpers for the pygame front end.
+"""
+
+from collections import OrderedDict
+import json, os
+import pygame
+
+
+class LabelCache(object):
+    """
+    A least-recently-used cache of rendered text surfaces, keyed by text, font and color.
+    """
+
+    def __init__(self, maxSize = 64):
+        """
+        Initialize an empty cache holding at most maxSize labels.
+        """
+        self.maxSize = maxSize
+        self.labels = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias = 1):
+        """
+        Return font.render(text, antialias, color), rendering it only if it is not cached.
+        """
+        key = (text, font, color, antialias)
+        label = self.labels.pop(key, None)
+        if label is None:
+            self.misses += 1
+            label = font.render(text, antialias, color)
+            if len(self.labels) >= self.maxSize: # evict least recently used label
+                self.labels.popitem(last=False)
+        else:
+            self.hits += 1
+        self.labels[key] = label # most recently used labels are kept at the end
+        return label
+
+    def clear(self):
+        self.labels.clear()
+
+    def getHits(self):
+        return self.hits
+
+    def getMisses(self):
+        return self.misses
+
+    def __len__(self):
+        return len(self.labels)
+
+
+class Viewport(object):
+    """
+    A scrollable, zoomable window onto a grid of tiles.
+    x, y, width and height give the window's area on screen. scrollX and scrollY
+    give the grid pixel (at the current tileSize) shown at the window's top-left corner.
+    """
+
+    def __init__(self, x, y, width, height, numRows, numCols, tileSize, minTileSize = 8, maxTileSize = 100):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.numRows = numRows
+        self.numCols = numCols
+        self.tileSize = tileSize
+        self.minTileSize = minTileSize
+        self.maxTileSize = maxTileSize
+        self.scrollX = 0
+        self.scrollY = 0
+
+    def getRect(self):
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+    def getTileSize(self):
+        return self.tileSize
+
+    def clampScroll(self):
+        """
+        Keep the window from scrolling past the edges of the grid.
+        """
+        self.scrollX = max(0, min(self.scrollX, self.numCols*self.tileSize - self.width))
+        self.scrollY = max(0, min(self.scrollY, self.numRows*self.tileSize - self.height))
+
+    def scroll(self, dx, dy):
+        """
+        Scroll the window by dx, dy pixels.
+        Return True if the window moved.
+        """
+        old = (self.scrollX, self.scrollY)
+        self.scrollX += dx
+        self.scrollY += dy
+        self.clampScroll()
+        return (self.scrollX, self.scrollY) != old
+
+    def zoom(self, factor, anchorX = None, anchorY = None):
+        """
+        Multiply the tile size by factor, keeping the grid point under screen
+        position anchorX, anchorY (the window's center by default) in place.
+        Return True if the tile size changed.
+        """
+        if anchorX is None:
+            anchorX = self.x + self.width/2
+        if anchorY is None:
+            anchorY = self.y + self.height/2
+        tileSize = max(self.minTileSize, min(int(round(self.tileSize*factor)), self.maxTileSize))
+        if tileSize == self.tileSize:
+            return False
+        self.scrollX = (self.scrollX + anchorX - self.x)*tileSize // self.tileSize - (anchorX - self.x)
+        self.scrollY = (self.scrollY + anchorY - self.y)*tileSize // self.tileSize - (anchorY - self.y)
+        self.tileSize = tileSize
+        self.clampScroll()
+        return True
+
+    def cellAt(self, x, y):
+        """
+        Return the (row, col) of the tile under screen position x, y, or None if there is none.
+        """
+        if not (self.x <= x < self.x + self.width and self.y <= y < self.y + self.height):
+            return None
+        row = (y - self.y + self.scrollY) // self.tileSize
+        col = (x - self.x + self.scrollX) // self.tileSize
+        if 0 <= row < self.numRows and 0 <= col < self.numCols:
+            return row, col
+        return None
+
+    def tilePosition(self, row, col):
+        """
+        Return the screen position of the top-left corner of the tile at row, col.
+        """
+        return (self.x + col*self.tileSize - self.scrollX, self.y + row*self.tileSize - self.scrollY)
+
+    def visibleRows(self):
+        return xrange(self.scrollY // self.tileSize,
+                      min(self.numRows, (self.scrollY + self.height - 1) // self.tileSize + 1))
+
+    def visibleCols(self):
+        return xrange(self.scrollX // self.tileSize,
+                      min(self.numCols, (self.scrollX + self.width - 1) // self.tileSize + 1))
+
+    def isVisible(self, row, col):
+        return (self.scrollY // self.tileSize <= row <= (self.scrollY + self.height - 1) // self.tileSize and
+                self.scrollX // self.tileSize <= col <= (self.scrollX + self.width - 1) // self.tileSize)
+
+    def getNumVisibleTiles(self):
+        return len(self.visibleRows()) * len(self.visibleCols())
+
+
+class FontCache(object):
+    """
+    System fonts by name, size and boldness, loaded on first use.
+    pygame.font.SysFont scans every installed font the first time it is called, so the
+    file each font resolves to is kept in a JSON file and later runs open it directly.
+    """
+
+    def __init__(self, path = None):
+        """
+        Initialize the cache, reading resolved font paths from the JSON file at path if it exists.
+        """
+        self.path = path
+        self.fonts = {}
+        self.paths = {}
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.paths = json.load(f)
+            except (IOError, ValueError): # unreadable cache, so resolve the fonts again
+                pass
+
+    def get(self, name, size, bold = False):
+        """
+        Return the Font that pygame.font.SysFont(name, size, bold) would.
+        """
+        key = (name, size, bold)
+        font = self.fonts.get(key)
+        if font is None:
+            path, setBold = self.resolve(name, bold)
+            font = self.fonts[key] = pygame.font.Font(path, size)
+            font.set_bold(setBold)
+        return font
+
+    def resolve(self, name, bold):
+        """
+        Return the path of the font file SysFont picks for name, or None for pygame's
+        default font, and whether the font has to be emboldened because no bold file exists.
+        """
+        key = name + (':bold' if bold else '')
+        res = self.paths.get(key)
+        if res is None or res[0] is not None and not os.path.exists(res[0]):
+            res = self.paths[key] = pygame.font.SysFont(name, 0, bold,
+                                                        constructor=lambda path, size, bold, italic: [path, bold])
+            self.save()
+        return res
+
+    def save(self):
+        """
+        Write the resolved font paths to the cache file, if there is one and it can be written.
+        """
+        if self.path is None:
+            return
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(self.paths, f)
+        except IOError:
+            pass
+
+
+class SpriteAtlas(object):
+    """
+    Equal-sized square sprites packed side by side into one surface, looked up by name.
+    Each sprite is scaled once per tile size into a scaled copy of the atlas, so a frame
+    draws every tile as an area of the same pre-converted surface and can hand them
+    all to Surface.blits in one call.
+    """
+
+    def __init__(self, images):
+        """
+        Pack images, a list of (name, surface) pairs, into the atlas.
+        The display mode must be set, since the atlas is converted to the display's format.
+        """
+        self.names = [name for name, image in images]
+        self.size = images[0][1].get_width()
+        self.images = images
+        self.surfaces = {} # atlas scaled to each tile size, by size
+        self.areas = {} # area of each sprite in the scaled atlas, by size and name
+        self.surfaces[self.size] = self.pack(self.size)
+
+    def pack(self, size):
+        """
+        Return a new atlas surface with every sprite scaled to size x size pixels.
+        Sprites are scaled one by one so their edges do not bleed into each other.
+        """
+        surface = pygame.Surface((size*len(self.images), size), pygame.SRCALPHA, 32).convert_alpha()
+        areas = self.areas[size] = {}
+        for k, (name, image) in enumerate(self.images):
+            if image.get_size() != (size, size):
+                image = pygame.transform.smoothscale(image, (size, size))
+            areas[name] = surface.blit(image, (k*size, 0))
+        return surface
+
+    def getSurface(self, size):
+        """
+        Return the atlas with its sprites scaled to size x size pixels.
+        """
+        surface = self.surfaces.get(size)
+        if surface is None:
+            surface = self.surfaces[size] = self.pack(size)
+        return surface
+
+    def getAreas(self, size):
+        """
+        Return a dict of the area of each sprite, by name, in getSurface(size).
+        """
+        if size not in self.areas:
+            self.getSurface(size)
+        return self.areas[size]
+
+    def getNames(self):
+        return self.names
+
+    def clear(self):
+        """
+        Drop the scaled copies of the atlas, keeping the one at the sprites' own size.
+        """
+        for size in self.surfaces.keys():
+            if size != self.size:
+                del self.surfaces[size]
+                del self.areas[size]
+
+
+def loadAtlas(paths):
+    """
+    Load the images at paths, a list of (name, path) pairs, into a SpriteAtlas.
+    """
+    return SpriteAtlas([(name, pygame.image.load(path)) for name, path in paths])
@@ -0,0 +1,188 @@
+"""
+Compact binary save files for boards, and append-only move logs for replaying games.
+
+A board file is a header followed by three bit-packed masks of one bit per tile,
+in row-major order with the first tile in the high bit of the first byte:
+
+    header      '<4sBIII': magic 'MSWB', version, width, height, numMines
+    mined       ceil(width*height / 8) bytes
+    uncovered   ceil(width*height / 8) bytes
+    flagged     ceil(width*height / 8) bytes
+
+Numbers are not stored; they are recomputed from the mines on load.
+
+A move log is the header '<4sB' (magic 'MSWL', version) followed by one '<III'
+record (action, row, col) per move, where action is ord('u') or ord('f').
+Saving a board before its first move and logging every move afterwards is
+enough to replay the game exactly. Boards that place their mines on the first
+uncover are replayed from their seed and safeRadius and the move log instead.
+"""
+
+import binascii, mmap, os, string, struct, sys
+from array import array
+import minesweeper
+
+BOARD_MAGIC = 'MSWB'
+LOG_MAGIC = 'MSWL'
+VERSION = 1
+BOARD_HEADER = struct.Struct('<4sBIII')
+LOG_HEADER = struct.Struct('<4sB')
+MOVE = struct.Struct('<III')
+
+_BYTES_TO_BITS = string.maketrans('\x00\x01', '01')
+_BITS_TO_BYTES = string.maketrans('01', '\x00\x01')
+
+
+class SaveFileError(Exception):
+    """
+    Raise this error when a save file or move log is malformed.
+    """
+    def __init__(self, message):
+        self.message = message
+    def __str__(self):
+        return self.message
+
+
+def packBits(values):
+    """
+    Pack a bytearray of 0s and 1s into a string of ceil(len(values) / 8) bytes.
+    """
+    numBytes = (len(values) + 7) // 8
+    if numBytes == 0:
+        return ''
+    bits = str(values).translate(_BYTES_TO_BITS) + '0'*(8*numBytes - len(values))
+    return binascii.unhexlify('%0*x' % (2*numBytes, int(bits, 2)))
+
+
+def unpackBits(data, n):
+    """
+    Unpack the first n bits of the string data into a bytearray of 0s and 1s.
+    """
+    if n == 0:
+        return bytearray()
+    bits = bin(int(binascii.hexlify(data), 16))[2:].zfill(8*len(data))
+    return bytearray(bits[:n].translate(_BITS_TO_BYTES))
+
+
+def dumps(board):
+    """
+    Return the board in the binary board format as a string.
+    Raise a SaveFileError if the board's mines have not been placed yet; a board
+    waiting for a safe first click is reproduced by its seed and safeRadius instead.
+    """
+    if not board.minesPlaced:
+        raise SaveFileError('Mines have not been placed yet.')
+    return ''.join([BOARD_HEADER.pack(BOARD_MAGIC, VERSION, board.width, board.height, board.numMines),
+                    packBits(board.mined), packBits(board.uncovered), packBits(board.flagged)])
+
+
+def loads(data):
+    """
+    Return a Board read from data, a string (or mmap) in the binary board format.
+    Raise a SaveFileError if data is not a board of a supported version.
+    """
+    if len(data) < BOARD_HEADER.size:
+        raise SaveFileError('Board data is truncated.')
+    magic, version, width, height, numMines = BOARD_HEADER.unpack_from(data)
+    if magic != BOARD_MAGIC:
+        raise SaveFileError('Not a board file.')
+    if version != VERSION:
+        raise SaveFileError('Unsupported board file version ' + str(version))
+    numTiles = width * height
+    maskSize = (numTiles + 7) // 8
+    if len(data) < BOARD_HEADER.size + 3*maskSize:
+        raise SaveFileError('Board data is truncated.')
+    masks = []
+    for k in xrange(3):
+        start = BOARD_HEADER.size + k*maskSize
+        masks.append(unpackBits(data[start:start+maskSize], numTiles))
+    mined, uncovered, flagged = masks
+    board = minesweeper.Board(width, height, numMines, mined)
+    board.uncovered = uncovered
+    board.flagged = flagged
+    board.numCoveredTiles = numTiles - uncovered.count('\x01')
+    board.numFlaggedTiles = flagged.count('\x01')
+    board.updateState()
+    return board
+
+
+def saveBoard(board, path):
+    with open(path, 'wb') as f:
+        f.write(dumps(board))
+
+
+def loadBoard(path):
+    """
+    Return the Board saved at path, reading it through a read-only memory map.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise SaveFileError('Board file is empty.')
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return loads(data)
+        finally:
+            data.close()
+
+
+class MoveLog(object):
+    """
+    An append-only log of the moves made in a game.
+    """
+
+    def __init__(self, path):
+        """
+        Open the move log at path, creating it if it does not exist.
+        """
+        self.path = path
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(LOG_HEADER.pack(LOG_MAGIC, VERSION))
+            self.file.flush()
+
+    def append(self, action, row, col):
+        """
+        Record a move; action is 'u' to uncover or 'f' to flag/unflag.
+        """
+        if action not in ('u', 'f'):
+            raise ValueError('Unknown action ' + repr(action))
+        self.file.write(MOVE.pack(ord(action), row, col))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def readMoves(path):
+    """
+    Return the list of (action, row, col) moves recorded in the move log at path.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < LOG_HEADER.size or LOG_HEADER.unpack_from(data) != (LOG_MAGIC, VERSION):
+        raise SaveFileError('Not a move log of a supported version.')
+    body = data[LOG_HEADER.size:]
+    body = body[:len(body) - len(body) % MOVE.size] # drop a record cut off mid-write
+    values = array('I')
+    values.fromstring(body)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return [(chr(values[k]), values[k+1], values[k+2]) for k in xrange(0, len(values), 3)]
+
+
+def replay(board, moves):
+    """
+    Apply moves, a list of (action, row, col), to board in order and return the board.
+    """
+    for action, row, col in moves:
+        if action == 'u':
+            board.uncoverTileAt(row, col)
+        else:
+            board.flagTileAt(row, col)
+    return board
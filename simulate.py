@@ -0,0 +1,183 @@
+"""
+Headless batch simulation of minesweeper games.
+Plays many games with a pluggable strategy across a process pool and streams
+one result per game as JSON lines or CSV, e.g.
+
+    python simulate.py --games 10000 --width 16 --height 16 --mines 40 --format csv
+
+A strategy is a class constructed with (board, rng) that has a nextMove method
+returning the next move, and an update method that is told which tiles each move changed.
+"""
+
+import argparse, csv, importlib, json, multiprocessing, random, sys, time
+import minesweeper, probability, solver
+
+
+class RandomStrategy(object):
+    """
+    Uncover a random covered, unflagged tile every move.
+    """
+
+    def __init__(self, board, rng):
+        self.board = board
+        self.rng = rng
+
+    def nextMove(self):
+        """
+        Return the next move as (action, row, col), where action is 'u' to uncover or 'f' to flag/unflag.
+        """
+        while True:
+            row = self.rng.randrange(self.board.height)
+            col = self.rng.randrange(self.board.width)
+            tile = self.board.getTileAt(row, col)
+            if not tile.isUncovered() and not tile.isFlagged():
+                return 'u', row, col
+
+    def update(self, indices):
+        """
+        Called after each move with the indices of the tiles it changed.
+        """
+        pass
+
+
+class SolverStrategy(RandomStrategy):
+    """
+    Uncover a tile the solver knows is safe, or a random unknown tile if there is none.
+    """
+
+    def __init__(self, board, rng):
+        RandomStrategy.__init__(self, board, rng)
+        self.solver = solver.Solver(board)
+
+    def nextMove(self):
+        hint = self.solver.getHint()
+        if hint is not None:
+            return ('u',) + hint
+        while True:
+            row, col = RandomStrategy.nextMove(self)[1:]
+            if row*self.board.width + col not in self.solver.mines:
+                return 'u', row, col
+
+    def update(self, indices):
+        self.solver.update(indices)
+
+
+class ProbabilityStrategy(SolverStrategy):
+    """
+    Uncover a tile the solver knows is safe, or else the tile least likely to be mined.
+    """
+
+    def __init__(self, board, rng):
+        SolverStrategy.__init__(self, board, rng)
+        self.engine = probability.ProbabilityEngine(self.solver)
+
+    def nextMove(self):
+        return ('u',) + self.engine.getSafestTile()
+
+
+STRATEGIES = {
+    'random': RandomStrategy,
+    'solver': SolverStrategy,
+    'probability': ProbabilityStrategy,
+}
+
+FIELDS = ['game', 'seed', 'width', 'height', 'mines', 'won', 'moves', 'revealed', 'seconds']
+
+
+def loadStrategy(name):
+    """
+    Return the strategy class called name: either a key of STRATEGIES or 'module:Class'.
+    """
+    if name in STRATEGIES:
+        return STRATEGIES[name]
+    if ':' not in name:
+        raise ValueError('Unknown strategy ' + name)
+    module, cls = name.split(':', 1)
+    return getattr(importlib.import_module(module), cls)
+
+
+def playGame(game):
+    """
+    Play one game described by the tuple (index, seed, width, height, numMines, strategy, safeRadius).
+    Return a dict of its results keyed by FIELDS.
+    """
+    index, seed, width, height, numMines, strategy, safeRadius = game
+    start = time.time()
+    rng = random.Random(seed)
+    board = minesweeper.Board(width, height, numMines, seed=rng.getrandbits(64), safeRadius=safeRadius)
+    player = loadStrategy(strategy)(board, rng)
+    board.addCellObserver(player.update)
+    moves = 0
+    while board.getState() == minesweeper.PLAYING:
+        action, row, col = player.nextMove()
+        moves += 1
+        if action == 'u':
+            board.revealTileAt(row, col)
+        else:
+            board.flagTileAt(row, col)
+    return {'game': index, 'seed': seed, 'width': width, 'height': height, 'mines': numMines,
+            'won': board.getState() == minesweeper.WON, 'moves': moves, 'revealed': board.getNumTiles() - board.getNumCoveredTiles(),
+            'seconds': round(time.time() - start, 6)}
+
+
+def simulate(numGames, width, height, numMines, strategy = 'random', seed = 0, processes = None, safeRadius = None):
+    """
+    Yield the results of numGames games, in the order they finish.
+    Game i is seeded with seed + i, so results are reproducible whatever the number of processes.
+    safeRadius is passed to Board to make the first move safe.
+    """
+    games = ((i, seed + i, width, height, numMines, strategy, safeRadius) for i in xrange(numGames))
+    if processes == 1:
+        for game in games:
+            yield playGame(game)
+        return
+    pool = multiprocessing.Pool(processes)
+    try:
+        chunksize = max(1, min(64, numGames // (4*(processes or multiprocessing.cpu_count()))))
+        for result in pool.imap_unordered(playGame, games, chunksize):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play minesweeper games headlessly and report the results.')
+    parser.add_argument('--games', type=int, default=1000, help='number of games to play')
+    parser.add_argument('--width', type=int, default=10)
+    parser.add_argument('--height', type=int, default=10)
+    parser.add_argument('--mines', type=int, default=10)
+    parser.add_argument('--strategy', default='random',
+                        help='one of %s, or module:Class' % ', '.join(sorted(STRATEGIES)))
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--safe-radius', type=int, default=None,
+                        help='keep the first move and tiles this close to it mine-free')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('--output', default='-', help='file to write results to (default: stdout)')
+    options = parser.parse_args()
+
+    out = sys.stdout if options.output == '-' else open(options.output, 'w')
+    if options.format == 'csv':
+        writer = csv.DictWriter(out, FIELDS)
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        write = lambda result: out.write(json.dumps(result, sort_keys=True) + '\n')
+    wins = games = 0
+    start = time.time()
+    for result in simulate(options.games, options.width, options.height, options.mines,
+                           options.strategy, options.seed, options.processes, options.safe_radius):
+        write(result)
+        games += 1
+        wins += result['won']
+    elapsed = time.time() - start
+    sys.stderr.write('%d games, %d won (%.1f%%), %.1f games/s\n' % (
+        games, wins, 100.*wins / max(games, 1), games / max(elapsed, 1e-9)))
+    if out is not sys.stdout:
+        out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,316 @@
+"""
+A minesweeper solver that deduces guaranteed-safe tiles and guaranteed mines
+from the numbers uncovered on a Board.
+
+Every uncovered number gives a constraint: its covered neighbors hold exactly
+number minus its flagged neighbors mines. Flagged tiles are assumed to be mines,
+so when a flag is placed or removed every deduction that may have leaned on it
+is forgotten and made again from the constraints.
+Constraints are only recomputed around the tiles changed by each move, so the
+cost of keeping up with a game depends on how much of the board changes, not on
+the size of the board.
+"""
+
+import minesweeper
+
+
+class Solver(object):
+    """
+    Tracks the constraints of a Board and deduces safe tiles and mines from them, using
+    single-constraint rules, pair (subset) rules and, for small groups of constraints that
+    share tiles, exact enumeration of every mine layout.
+    """
+
+    def __init__(self, board, maxComponentSize = 20):
+        """
+        Initialize the solver from the current state of board.
+        Components of more than maxComponentSize unknown tiles are never enumerated.
+        """
+        self.board = board
+        self.maxComponentSize = maxComponentSize
+        self.constraints = {} # number tile index -> (frozenset of unknown tile indices, mines among them)
+        self.cellConstraints = {} # unknown tile index -> set of number tile indices constraining it
+        self.safe = set() # covered tiles deduced to be safe
+        self.mines = set() # unflagged tiles deduced to be mines
+        self.dirty = set() # constraints not yet checked with the single and pair rules
+        self.pending = set() # constraints not yet checked by enumeration
+        self.update([i for i in xrange(board.getNumTiles()) if board.uncovered[i] or board.flagged[i]])
+
+    def uncoverTileAt(self, row, col):
+        """
+        Uncover a tile on the board and update the constraints around the tiles it revealed.
+        Return True if tile is mined, False if tile is not mined.
+        """
+        revealed = self.board.revealTileAt(row, col)
+        self.update(revealed)
+        return self.board.getTileAt(row, col).isMined()
+
+    def flagTileAt(self, row, col):
+        """
+        Flag/unflag a tile on the board and update the constraints around it.
+        """
+        self.board.flagTileAt(row, col)
+        self.update([row*self.board.width + col])
+
+    def update(self, indices):
+        """
+        Recompute the constraints affected by changes to the tiles at indices.
+        """
+        board = self.board
+        affected = set()
+        covered = [] # flagged, unflagged or covered again by an undo
+        for i in indices:
+            self.safe.discard(i)
+            if board.uncovered[i] or board.flagged[i]: # mines only holds covered, unflagged tiles
+                self.mines.discard(i)
+            if not board.uncovered[i]:
+                covered.append(i)
+            affected.add(i)
+            affected.update(board.getNeighbors(i))
+        if covered:
+            affected.update(self.forgetDeductions(covered))
+        for i in affected:
+            self.setConstraint(i)
+
+    def forgetDeductions(self, cells):
+        """
+        Forget the deductions about every unflagged covered tile linked to cells through
+        shared numbers, since they may have been made from the old state of cells.
+        Return the indices of the numbers around those tiles, whose constraints need recomputing.
+        """
+        board = self.board
+        numbers = set()
+        seen = set(cells)
+        stack = list(cells)
+        while stack:
+            for j in board.getNeighbors(stack.pop()):
+                if j in numbers or not board.uncovered[j] or board.mined[j]:
+                    continue
+                numbers.add(j)
+                for k in board.getNeighbors(j):
+                    if k not in seen and not board.uncovered[k] and not board.flagged[k]:
+                        seen.add(k)
+                        stack.append(k)
+        self.safe.difference_update(seen)
+        self.mines.difference_update(seen)
+        return numbers
+
+    def setConstraint(self, i):
+        """
+        Recompute the constraint given by the number at index i, and queue it for analysis.
+        """
+        board = self.board
+        old = self.constraints.pop(i, None)
+        if old is not None:
+            for cell in old[0]:
+                linked = self.cellConstraints[cell]
+                linked.discard(i)
+                if not linked:
+                    del self.cellConstraints[cell]
+        if not board.uncovered[i] or board.mined[i]:
+            return
+        count = board.numbers[i]
+        cells = []
+        for j in board.getNeighbors(i):
+            if board.uncovered[j] or j in self.safe:
+                continue
+            if board.flagged[j] or j in self.mines:
+                count -= 1
+            else:
+                cells.append(j)
+        if not cells:
+            return
+        self.constraints[i] = (frozenset(cells), count)
+        for cell in cells:
+            self.cellConstraints.setdefault(cell, set()).add(i)
+        self.dirty.add(i)
+        self.pending.add(i)
+
+    def markSafe(self, cells):
+        self.safe.update(cells)
+        self.cellsDeduced(cells)
+
+    def markMines(self, cells):
+        self.mines.update(cells)
+        self.cellsDeduced(cells)
+
+    def cellsDeduced(self, cells):
+        """
+        Drop newly deduced cells from the constraints that contain them.
+        """
+        affected = set()
+        for cell in cells:
+            affected.update(self.cellConstraints.get(cell, ()))
+        for i in affected:
+            self.setConstraint(i)
+
+    def analyze(self):
+        """
+        Deduce everything the rules allow from the constraints changed since the last call.
+        """
+        while self.dirty or self.pending:
+            while self.dirty:
+                self.applyRules(self.dirty.pop())
+            self.enumeratePending()
+
+    def applyRules(self, i):
+        """
+        Apply the single-constraint and pair rules to the constraint at index i.
+        """
+        constraint = self.constraints.get(i)
+        if constraint is None:
+            return
+        cells, count = constraint
+        if count < 0 or count > len(cells): # contradicted by a wrong flag
+            return
+        if count == 0: # every cell is safe
+            self.markSafe(cells)
+            return
+        if count == len(cells): # every cell is a mine
+            self.markMines(cells)
+            return
+        overlapping = set()
+        for cell in cells:
+            overlapping.update(self.cellConstraints[cell])
+        overlapping.discard(i)
+        for j in overlapping:
+            other = self.constraints.get(j)
+            if other is None:
+                continue
+            for (aCells, aCount), (bCells, bCount) in (((cells, count), other), (other, (cells, count))):
+                # if b's cells outside a must hold every mine b has beyond a's,
+                # then those are all mines and a's cells outside b are all safe
+                onlyB = bCells - aCells
+                if onlyB and bCount - aCount == len(onlyB):
+                    self.markMines(onlyB)
+                    self.markSafe(aCells - bCells)
+                    return
+                # a's cells outside b hold at most len(aCells - bCells) of a's mines,
+                # so if b needs no more mines than that, b's cells outside a are safe
+                if onlyB and bCount - aCount + len(aCells - bCells) == 0:
+                    self.markSafe(onlyB)
+                    return
+
+    def enumeratePending(self):
+        """
+        Enumerate the mine layouts of every small component containing a pending
+        constraint, and deduce the cells that are mined in all or none of them.
+        """
+        while self.pending:
+            i = self.pending.pop()
+            if i not in self.constraints:
+                continue
+            component = self.component(i)
+            self.pending.difference_update(component)
+            constraints = [self.constraints[j] for j in component]
+            cells, solutions = enumerateComponent(constraints, self.maxComponentSize)
+            if not solutions:
+                continue
+            total = sum(n for n, counts in solutions.itervalues())
+            mineCounts = [sum(counts[k] for n, counts in solutions.itervalues()) for k in xrange(len(cells))]
+            safe = [cell for cell, n in zip(cells, mineCounts) if n == 0]
+            mines = [cell for cell, n in zip(cells, mineCounts) if n == total]
+            if safe:
+                self.markSafe(safe)
+            if mines:
+                self.markMines(mines)
+
+    def component(self, i):
+        """
+        Return the indices of the constraints connected to the constraint at index i through shared cells.
+        """
+        component = [i]
+        found = set(component)
+        for j in component:
+            for cell in self.constraints[j][0]:
+                for k in self.cellConstraints[cell]:
+                    if k not in found:
+                        found.add(k)
+                        component.append(k)
+        return component
+
+    def getFrontier(self):
+        """
+        Return the set of covered, undeduced tile indices adjacent to an uncovered number.
+        """
+        return set(self.cellConstraints)
+
+    def getSafeTiles(self):
+        """
+        Return the (row, col) of every covered tile known to be safe.
+        """
+        self.analyze()
+        return [divmod(i, self.board.width) for i in sorted(self.safe)]
+
+    def getMines(self):
+        """
+        Return the (row, col) of every unflagged tile known to be a mine.
+        """
+        self.analyze()
+        return [divmod(i, self.board.width) for i in sorted(self.mines)]
+
+    def getHint(self):
+        """
+        Return the (row, col) of a tile that is safe to uncover, or None if none is known.
+        """
+        self.analyze()
+        if not self.safe:
+            return None
+        return divmod(min(self.safe), self.board.width)
+
+
+def enumerateComponent(constraints, maxCells = None):
+    """
+    Count the mine layouts that satisfy every constraint, a list of (cells, count) pairs.
+    Return (cells, solutions), where cells lists every cell in the constraints and
+    solutions maps a number of mines k to (number of layouts with k mines, a list of how
+    many of those layouts have a mine on each cell).
+    If there are more than maxCells cells nothing is enumerated and solutions is empty.
+    """
+    cells = []
+    index = {}
+    for constraintCells, count in constraints:
+        for cell in constraintCells:
+            if cell not in index: # keep cells from the same constraint together to prune early
+                index[cell] = len(cells)
+                cells.append(cell)
+    if maxCells is not None and len(cells) > maxCells:
+        return cells, {}
+    cellConstraints = [[] for cell in cells]
+    remaining = [] # mines each constraint still needs
+    unassigned = [] # cells of each constraint not assigned yet
+    for c, (constraintCells, count) in enumerate(constraints):
+        for cell in constraintCells:
+            cellConstraints[index[cell]].append(c)
+        remaining.append(count)
+        unassigned.append(len(constraintCells))
+    assignment = [0]*len(cells)
+    solutions = {}
+
+    def assign(k, numMines):
+        if k == len(cells):
+            solution = solutions.get(numMines)
+            if solution is None:
+                solution = solutions[numMines] = [0, [0]*len(cells)]
+            solution[0] += 1
+            counts = solution[1]
+            for j in xrange(len(cells)):
+                counts[j] += assignment[j]
+            return
+        for value in (0, 1):
+            ok = True
+            for c in cellConstraints[k]:
+                remaining[c] -= value
+                unassigned[c] -= 1
+                if remaining[c] < 0 or remaining[c] > unassigned[c]:
+                    ok = False
+            if ok:
+                assignment[k] = value
+                assign(k + 1, numMines + value)
+            for c in cellConstraints[k]:
+                remaining[c] += value
+                unassigned[c] += 1
+        assignment[k] = 0
+
+    assign(0, 0)
+    return cells, dict((k, (n, counts)) for k, (n, counts) in solutions.iteritems())
@@ -0,0 +1,103 @@
+"""
+Timing and memory benchmarks of the board's hot paths, run with pytest-benchmark.
+
+Save a new baseline under .benchmarks/ with
+    python -m pytest tests/test_benchmarks.py --benchmark-autosave
+and check for regressions against the latest saved run with
+    python -m pytest tests/test_benchmarks.py --benchmark-compare --benchmark-compare-fail=mean:25%
+Skip them in quick runs with --benchmark-skip.
+"""
+
+import random
+import pytest
+import benchmark as benchmarks
+import minesweeper
+
+SIZES = [50, 200, 500]
+DENSITIES = [0.05, 0.15, 0.3]
+
+
+@pytest.mark.parametrize('density', DENSITIES)
+@pytest.mark.parametrize('size', SIZES)
+def test_construct(benchmark, size, density):
+    benchmark.group = 'construct %dx%d' % (size, size)
+    numMines = int(size*size*density)
+    board = benchmark(minesweeper.Board, size, size, numMines, seed=0)
+    assert board.mined.count('\x01') == numMines
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_flood_fill_worst_case(benchmark, size):
+    benchmark.group = 'flood fill'
+    boards = []
+    def setup():
+        boards.append(minesweeper.Board(size, size, 0))
+        return (boards[-1], 0, 0), {}
+    benchmark.pedantic(lambda board, row, col: board.revealTileAt(row, col), setup=setup, rounds=3)
+    assert boards[-1].getNumCoveredTiles() == 0
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_undo_flood_fill(benchmark, size):
+    benchmark.group = 'undo'
+    def setup():
+        board = minesweeper.Board(size, size, 0)
+        board.revealTileAt(0, 0)
+        return (board,), {}
+    changed = benchmark.pedantic(minesweeper.Board.undo, setup=setup, rounds=3)
+    assert len(changed) == size*size
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_sequential_flags(benchmark, size):
+    benchmark.group = 'flags'
+    numMines = size*size // 10
+    def setup():
+        board = minesweeper.Board(size, size, numMines, seed=0)
+        return (board, random.Random(0).sample(xrange(size*size), numMines)), {}
+    def flagAll(board, tiles):
+        for i in tiles:
+            board.flagTileAt(i // size, i % size)
+        return board
+    board = benchmark.pedantic(flagAll, setup=setup, rounds=3)
+    assert board.getNumFlaggedTiles() == numMines
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_bulk_flags(benchmark, size):
+    benchmark.group = 'flags'
+    numMines = size*size // 10
+    def setup():
+        board = minesweeper.Board(size, size, numMines, seed=0)
+        tiles = random.Random(0).sample(xrange(size*size), numMines)
+        return (board, [i // size for i in tiles], [i % size for i in tiles]), {}
+    def flagAll(board, rows, cols):
+        board.flagMany(rows, cols)
+        return board
+    board = benchmark.pedantic(flagAll, setup=setup, rounds=3)
+    assert board.getNumFlaggedTiles() == numMines
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_render_string(benchmark, size):
+    benchmark.group = 'str'
+    board = minesweeper.Board(size, size, size*size // 6, seed=0)
+    text = benchmark(board.__str__, True)
+    assert text.count('\n') == size + 2
+
+
+@pytest.mark.parametrize('size,density,maxBytesPerTile', [(1000, 0.15, 40), (2000, 0.15, 40)])
+def test_construct_peak_memory(benchmark, size, density, maxBytesPerTile):
+    """
+    Peak RSS growth of building a board, measured in a fresh process.
+    """
+    benchmark.group = 'memory'
+    seconds, rss = benchmark.pedantic(benchmark_measure, args=(size, density), rounds=1, iterations=1)
+    bytesPerTile = rss*1024. / (size*size)
+    benchmark.extra_info['rss_kb'] = rss
+    benchmark.extra_info['bytes_per_tile'] = bytesPerTile
+    assert bytesPerTile < maxBytesPerTile
+
+
+def benchmark_measure(size, density):
+    return benchmarks.measure(minesweeper.Board, size, size, int(size*size*density))
@@ -0,0 +1,107 @@
+import random
+import pytest
+import minesweeper
+import chunkedboard
+
+
+def fullLayout(chunked):
+    """
+    Return the mine layout of the whole ChunkedBoard, assembled from its chunks.
+    """
+    mined = bytearray(chunked.numTiles)
+    size = chunked.chunkSize
+    for chunkRow in xrange(chunked.chunkRows):
+        for chunkCol in xrange(chunked.chunkCols):
+            width, height = chunked.chunkShape(chunkRow, chunkCol)
+            mines = chunked.chunkMines(chunkRow, chunkCol)
+            for row in xrange(height):
+                start = (chunkRow*size + row)*chunked.width + chunkCol*size
+                mined[start:start+width] = mines[row*width:(row+1)*width]
+    return mined
+
+
+def boardPair(width, height, numMines, seed, maxChunks):
+    chunked = chunkedboard.ChunkedBoard(width, height, numMines, seed=seed, chunkSize=8, maxChunks=maxChunks)
+    board = minesweeper.Board(width, height, numMines, fullLayout(chunked))
+    return chunked, board
+
+
+@pytest.mark.parametrize('maxChunks', [4, 256])
+def test_chunk_mine_counts_add_up(maxChunks):
+    chunked = chunkedboard.ChunkedBoard(37, 29, 150, seed=1, chunkSize=8, maxChunks=maxChunks)
+    assert fullLayout(chunked).count('\x01') == 150
+
+
+@pytest.mark.parametrize('maxChunks', [4, 256])
+def test_numbers_match_board(maxChunks):
+    chunked, board = boardPair(37, 29, 150, 2, maxChunks)
+    for row in xrange(board.height):
+        for col in xrange(board.width):
+            assert chunked.getTileAt(row, col).getNumber() == board.getTileAt(row, col).getNumber()
+            assert chunked.getTileAt(row, col).isMined() == board.getTileAt(row, col).isMined()
+    assert chunked.getNumLoadedChunks() <= maxChunks
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('maxChunks', [4, 256])
+def test_flood_fills_match_board(seed, maxChunks):
+    rng = random.Random(seed)
+    chunked, board = boardPair(41, 33, 60, seed, maxChunks)
+    safe = [i for i in xrange(board.getNumTiles()) if not board.mined[i]]
+    for i in rng.sample([i for i in xrange(board.getNumTiles()) if board.mined[i]], 10):
+        chunked.flagTileAt(*divmod(i, board.width)) # flags stop flood fills on both boards
+        board.flagTileAt(*divmod(i, board.width))
+    chunksRevealed = 0
+    for k in xrange(15):
+        i = rng.choice(safe)
+        revealed = chunked.revealTileAt(*divmod(i, board.width))
+        assert sorted(revealed) == sorted(board.revealTileAt(*divmod(i, board.width)))
+        assert chunked.getNumCoveredTiles() == board.getNumCoveredTiles()
+        chunksRevealed = max(chunksRevealed, len(set((j // board.width // 8, j % board.width // 8) for j in revealed)))
+    assert chunksRevealed > 1 # at least one fill crossed chunk edges
+    for i in xrange(board.getNumTiles()):
+        tile = chunked.getTileAt(*divmod(i, board.width))
+        assert tile.isUncovered() == (board.uncovered[i] == 1)
+        assert tile.isFlagged() == (board.flagged[i] == 1)
+    assert chunked.getNumLoadedChunks() <= maxChunks
+
+
+def test_flood_fill_crosses_chunks():
+    chunked = chunkedboard.ChunkedBoard(40, 40, 0, chunkSize=8, maxChunks=4)
+    assert len(chunked.revealTileAt(0, 0)) == 1600
+    assert chunked.getNumCoveredTiles() == 0
+    assert chunked.getNumLoadedChunks() == 4
+
+
+def test_evicted_chunks_keep_their_state():
+    chunked = chunkedboard.ChunkedBoard(64, 64, 400, seed=3, chunkSize=8, maxChunks=4)
+    mines = chunked.chunkMines(0, 0)
+    safe = divmod(mines.index('\x00'), 8) # a safe tile and a mine in the first chunk
+    flag = divmod(mines.index('\x01'), 8)
+    chunked.uncoverTileAt(*safe)
+    chunked.flagTileAt(*flag)
+    uncovered = [i for i in xrange(64*64) if chunked.getTileAt(*divmod(i, 64)).isUncovered()]
+    for chunkRow in xrange(8):
+        for chunkCol in xrange(8):
+            chunked.getTileAt(chunkRow*8, chunkCol*8).getNumber() # loads the chunk
+    assert (0, 0) in chunked.saved
+    assert chunked.getNumLoadedChunks() == 4
+    assert chunked.getTileAt(*flag).isFlagged()
+    assert chunked.getTileAt(*safe).isUncovered()
+    assert (0, 0) not in chunked.saved # reloaded
+    assert [i for i in xrange(64*64) if chunked.getTileAt(*divmod(i, 64)).isUncovered()] == uncovered
+
+
+def test_unchanged_chunks_are_not_saved():
+    chunked = chunkedboard.ChunkedBoard(64, 64, 40, seed=3, chunkSize=8, maxChunks=4)
+    for chunkCol in xrange(8):
+        chunked.getTileAt(0, chunkCol*8).getNumber()
+    assert chunked.saved == {}
+    assert chunked.getNumLoadedChunks() == 4
+
+
+def test_same_seed_same_layout():
+    a = chunkedboard.ChunkedBoard(30, 30, 90, seed=5, chunkSize=8, maxChunks=4)
+    b = chunkedboard.ChunkedBoard(30, 30, 90, seed=5, chunkSize=8)
+    assert fullLayout(a) == fullLayout(b)
+    assert fullLayout(a) != fullLayout(chunkedboard.ChunkedBoard(30, 30, 90, seed=6, chunkSize=8))
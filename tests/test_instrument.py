@@ -0,0 +1,74 @@
+import json
+import pytest
+import instrument
+import minesweeper
+
+
+@pytest.fixture
+def enabled():
+    instrument.reset()
+    instrument.enable()
+    yield
+    instrument.disable()
+    instrument.reset()
+
+
+def test_histogram_buckets():
+    h = instrument.Histogram()
+    for value in [0.5, 1, 3, 3, 100]:
+        h.add(value)
+    assert h.buckets == {0: 1, 1: 1, 2: 2, 7: 1}
+    assert h.count == 5 and h.max == 100
+    assert h.getPercentile(50) == 4
+    assert h.getPercentile(100) == 100
+    assert h.toDict()['buckets'] == {'<1': 1, '<2': 1, '<4': 2, '<128': 1}
+
+
+def test_disabled_records_nothing():
+    instrument.reset()
+    original = minesweeper.Board.__dict__['revealTileAt']
+    minesweeper.Board(10, 10, 0).revealTileAt(0, 0)
+    with instrument.timer('x'):
+        instrument.count('y')
+    assert instrument.getStats() == {'counters': {}, 'histograms': {}}
+    assert minesweeper.Board.__dict__['revealTileAt'] is original
+
+
+def test_board_methods_are_timed(enabled):
+    b = minesweeper.Board(10, 10, 1, bytearray(100))
+    b.uncoverTileAt(3, 3)
+    with pytest.raises(minesweeper.FlagError):
+        b.flagTileAt(0, 0)
+        b.flagTileAt(0, 1)
+    stats = instrument.getStats()['histograms']
+    assert stats['board.init']['count'] == 1
+    assert stats['board.uncover']['count'] == 1
+    assert stats['board.uncover.tiles']['max'] == 100
+    assert stats['board.flag']['count'] == 1 # the failed flag is not timed
+
+
+def test_disable_restores_board(enabled):
+    wrapped = minesweeper.Board.__dict__['revealTileAt']
+    instrument.disable()
+    assert minesweeper.Board.__dict__['revealTileAt'] is not wrapped
+    assert minesweeper.Board.__dict__['revealTileAt'].__name__ == 'revealTileAt'
+    minesweeper.Board(5, 5, 0).revealTileAt(0, 0)
+    assert instrument.getStats()['histograms'] == {}
+
+
+def test_timer_and_counters(enabled):
+    with instrument.timer('block'):
+        pass
+    instrument.count('things', 3)
+    instrument.count('things')
+    stats = instrument.getStats()
+    assert stats['counters'] == {'things': 4}
+    assert stats['histograms']['block']['count'] == 1
+
+
+def test_dump(enabled, tmpdir):
+    minesweeper.Board(5, 5, 0)
+    path = str(tmpdir.join('stats.json'))
+    instrument.dump(path)
+    with open(path) as f:
+        assert json.load(f)['histograms']['board.init']['count'] == 1
@@ -0,0 +1,503 @@
+import random
+import pytest
+import minesweeper
+
+
+def bruteForceNumbers(mined, width, height):
+    numbers = bytearray(width*height)
+    for row in xrange(height):
+        for col in xrange(width):
+            numbers[row*width + col] = sum(mined[r*width + c]
+                                           for r in xrange(row-1, row+2) for c in xrange(col-1, col+2)
+                                           if (r, c) != (row, col) and 0 <= r < height and 0 <= c < width)
+    return numbers
+
+
+# generation
+
+@pytest.mark.parametrize('width,height,numMines', [(1, 1, 0), (1, 1, 1), (10, 10, 10), (16, 16, 99), (5, 5, 25)])
+def test_board_has_requested_mines(width, height, numMines):
+    b = minesweeper.Board(width, height, numMines)
+    assert b.mined.count('\x01') == numMines
+    assert b.getNumMines() == numMines
+    assert b.getNumTiles() == width*height
+    assert b.getNumCoveredTiles() == width*height
+    assert b.getNumFlaggedTiles() == 0
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_numbers_count_neighboring_mines(seed):
+    rng = random.Random(seed)
+    width, height = rng.randint(1, 20), rng.randint(1, 20)
+    mined = bytearray(rng.random() < 0.2 for i in xrange(width*height))
+    assert minesweeper.countNeighbors(mined, width, height) == bruteForceNumbers(mined, width, height)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_count_neighbors_of_mine_indices(seed):
+    rng = random.Random(seed)
+    width, height = rng.randint(1, 20), rng.randint(1, 20)
+    mines = rng.sample(xrange(width*height), rng.randint(0, width*height))
+    mined = bytearray(width*height)
+    for i in mines:
+        mined[i] = 1
+    assert minesweeper.countNeighborsOf(mines, width, height) == bruteForceNumbers(mined, width, height)
+
+
+def test_count_neighbors_of_empty_board():
+    assert minesweeper.countNeighbors(bytearray(), 0, 0) == bytearray()
+
+
+def test_board_from_layout(board):
+    assert [board.getTileAt(i, i).isMined() for i in xrange(10)] == [True]*10
+    assert board.getTileAt(0, 1).getNumber() == 2
+    assert board.getTileAt(0, 9).getNumber() == 0
+
+
+def test_board_rejects_layout_of_wrong_size():
+    with pytest.raises(ValueError):
+        minesweeper.Board(3, 3, 1, bytearray(8))
+
+
+def test_too_many_mines():
+    with pytest.raises(ValueError):
+        minesweeper.Board(3, 3, 10)
+
+
+@pytest.mark.parametrize('safeRadius', [0, 1])
+def test_too_many_mines_for_safe_first_click(safeRadius):
+    with pytest.raises(ValueError):
+        minesweeper.Board(3, 3, 9, safeRadius=safeRadius)
+    b = minesweeper.Board(3, 3, 8, seed=0, safeRadius=safeRadius)
+    assert not b.uncoverTileAt(1, 1)
+    assert b.getState() == minesweeper.WON
+
+
+def test_seeded_boards_are_reproducible():
+    assert minesweeper.Board(30, 30, 100, seed=7).mined == minesweeper.Board(30, 30, 100, seed=7).mined
+    assert minesweeper.Board(30, 30, 100, seed=7).mined != minesweeper.Board(30, 30, 100, seed=8).mined
+
+
+@pytest.mark.parametrize('numMines', [0, 10, 50, 90, 99])
+def test_generate_mines_avoids_safe_tiles(numMines):
+    mined = minesweeper.generateMines(10, 10, numMines, random.Random(numMines), safe=[0])
+    assert mined.count('\x01') == numMines
+    assert mined[0] == 0
+
+
+@pytest.mark.parametrize('numMines', [0, 10, 50, 90, 99])
+def test_mine_indices_match_generate_mines(numMines):
+    mines = minesweeper.generateMineIndices(10, 10, numMines, random.Random(numMines), safe=[0])
+    mined = minesweeper.generateMines(10, 10, numMines, random.Random(numMines), safe=[0])
+    assert len(set(mines)) == numMines
+    assert sorted(mines) == [i for i in xrange(100) if mined[i]]
+
+
+def test_sparse_board_is_built_from_mine_indices():
+    b = minesweeper.Board(2000, 1000, 20, seed=3)
+    mines = minesweeper.generateMineIndices(2000, 1000, 20, random.Random(3))
+    assert [i for i in xrange(b.getNumTiles()) if b.mined[i]] == sorted(mines)
+    assert b.numbers == minesweeper.countNeighbors(b.mined, 2000, 1000)
+
+
+def test_generate_mines_without_room():
+    with pytest.raises(ValueError):
+        minesweeper.generateMines(3, 3, 9, random.Random(0), safe=[4])
+
+
+@pytest.mark.parametrize('safeRadius', [0, 1, 2])
+def test_first_click_is_safe(safeRadius):
+    for seed in xrange(20):
+        b = minesweeper.Board(9, 9, 10, seed=seed, safeRadius=safeRadius)
+        assert not b.minesPlaced
+        assert not b.uncoverTileAt(4, 4)
+        assert b.mined.count('\x01') == 10
+        assert not any(b.mined[i] for i in b.getRegion(4, 4, safeRadius))
+
+
+# uncover
+
+def test_uncover_empty_board_reveals_everything(emptyBoard):
+    revealed = emptyBoard.revealTileAt(0, 0)
+    assert sorted(revealed) == range(100)
+    assert emptyBoard.getNumCoveredTiles() == 0
+
+
+def test_uncover_mine(board):
+    assert board.uncoverTileAt(3, 3) is True
+    assert board.getTileAt(3, 3).isUncovered()
+    assert board.getNumCoveredTiles() == 99
+
+
+def test_uncover_number_reveals_only_that_tile(board):
+    assert list(board.revealTileAt(0, 1)) == [1]
+    assert board.getNumCoveredTiles() == 99
+
+
+def test_uncover_zero_floods_up_to_numbers(board):
+    assert board.uncoverTileAt(0, 9) is False
+    # tiles with c >= r+3 are 0; the fill also reveals the numbers directly beside them (c == r+2)
+    assert all(board.getTileAt(r, c).isUncovered() for r in xrange(10) for c in xrange(r+2, 10))
+    assert not any(board.getTileAt(r, c).isUncovered() for r in xrange(10) for c in xrange(0, min(r+2, 10)))
+    assert board.getNumCoveredTiles() == 64
+
+
+def test_uncover_twice_keeps_count(board):
+    board.uncoverTileAt(0, 9)
+    covered = board.getNumCoveredTiles()
+    assert len(board.revealTileAt(0, 9)) == 0
+    assert board.getNumCoveredTiles() == covered
+
+
+def test_uncover_flagged_tile(board):
+    board.flagTileAt(0, 0)
+    with pytest.raises(minesweeper.UncoverError):
+        board.uncoverTileAt(0, 0)
+    assert not board.getTileAt(0, 0).isUncovered()
+
+
+def test_flood_fill_stops_at_flags(emptyBoard):
+    for row in xrange(10):
+        emptyBoard.mined[row*10 + 5] = 1 # a wall the counts do not know about, so flag it
+    emptyBoard.numbers = minesweeper.countNeighbors(emptyBoard.mined, 10, 10)
+    emptyBoard.numMines = 10
+    emptyBoard.revealTileAt(0, 0)
+    assert not any(emptyBoard.getTileAt(r, c).isUncovered() for r in xrange(10) for c in xrange(5, 10))
+
+
+def test_large_flood_fill_does_not_recurse():
+    b = minesweeper.Board(300, 300, 0)
+    assert len(b.revealTileAt(150, 150)) == 90000
+
+
+@pytest.mark.parametrize('row,col', [(-1, 0), (0, -1), (10, 0), (0, 10)])
+def test_uncover_out_of_bounds(board, row, col):
+    with pytest.raises(IndexError):
+        board.uncoverTileAt(row, col)
+
+
+# flag
+
+def test_flag_and_unflag(board):
+    board.flagTileAt(2, 3)
+    assert board.getTileAt(2, 3).isFlagged()
+    assert board.getNumFlaggedTiles() == 1
+    board.flagTileAt(2, 3)
+    assert not board.getTileAt(2, 3).isFlagged()
+    assert board.getNumFlaggedTiles() == 0
+
+
+def test_flag_limit(board):
+    for col in xrange(10):
+        board.flagTileAt(0, col)
+    with pytest.raises(minesweeper.FlagError):
+        board.flagTileAt(1, 0)
+    assert not board.getTileAt(1, 0).isFlagged()
+    board.flagTileAt(0, 0) # unflagging is always allowed
+    assert board.getNumFlaggedTiles() == 9
+
+
+@pytest.mark.parametrize('row,col', [(-1, 0), (0, -1), (10, 0), (0, 10)])
+def test_flag_out_of_bounds(board, row, col):
+    with pytest.raises(IndexError):
+        board.flagTileAt(row, col)
+
+
+# chords
+
+def test_chord_reveals_unflagged_neighbors(board):
+    board.uncoverTileAt(0, 1) # a 2, next to the mines at (0, 0) and (1, 1)
+    board.flagTileAt(0, 0)
+    board.flagTileAt(1, 1)
+    revealed = board.chordTileAt(0, 1)
+    assert sorted(revealed) == [2, 10, 12]
+    assert board.getNumCoveredTiles() == 100 - 4
+    assert len(board.chordTileAt(0, 1)) == 0 # nothing left to uncover
+
+
+def test_chord_needs_matching_flags(board):
+    board.uncoverTileAt(0, 1)
+    board.flagTileAt(0, 0)
+    assert len(board.chordTileAt(0, 1)) == 0
+    assert len(board.chordTileAt(5, 5)) == 0 # covered tiles never chord
+    assert board.getNumCoveredTiles() == 99
+
+
+def test_chord_with_misplaced_flag_uncovers_mine(board):
+    board.uncoverTileAt(0, 1)
+    board.flagTileAt(0, 0)
+    board.flagTileAt(0, 2) # should have been (1, 1)
+    revealed = board.chordTileAt(0, 1)
+    assert 11 in revealed and board.getTileAt(1, 1).isMined()
+    assert sorted(revealed) == [10, 11, 12]
+
+
+def test_chord_floods_from_zero_neighbors(emptyBoard):
+    emptyBoard.mined[0] = 1
+    emptyBoard.numbers = minesweeper.countNeighbors(emptyBoard.mined, 10, 10)
+    emptyBoard.numMines = 1
+    emptyBoard.uncoverTileAt(1, 1)
+    emptyBoard.flagTileAt(0, 0)
+    revealed = emptyBoard.chordTileAt(1, 1)
+    assert emptyBoard.getNumCoveredTiles() == 1
+    assert len(revealed) == 98
+
+
+def test_chord_out_of_bounds(board):
+    with pytest.raises(IndexError):
+        board.chordTileAt(10, 0)
+
+
+# game state and observers
+
+def test_state_lost(board):
+    assert board.getState() == minesweeper.PLAYING
+    board.uncoverTileAt(0, 1)
+    assert board.getState() == minesweeper.PLAYING
+    board.uncoverTileAt(3, 3)
+    assert board.getState() == minesweeper.LOST
+
+
+def test_state_won(board):
+    for i in xrange(100):
+        if not board.mined[i] and board.getState() == minesweeper.PLAYING:
+            board.revealTileAt(*divmod(i, 10))
+    assert board.getState() == minesweeper.WON
+    assert board.getNumCoveredTiles() == board.getNumMines()
+
+
+def test_state_won_by_chord(emptyBoard):
+    emptyBoard.mined[0] = 1
+    emptyBoard.numbers = minesweeper.countNeighbors(emptyBoard.mined, 10, 10)
+    emptyBoard.numMines = 1
+    emptyBoard.uncoverTileAt(1, 1)
+    emptyBoard.flagTileAt(0, 0)
+    emptyBoard.chordTileAt(1, 1)
+    assert emptyBoard.getState() == minesweeper.WON
+
+
+def test_state_lost_in_bulk(board):
+    board.uncoverMany([0, 2], [1, 2])
+    assert board.getState() == minesweeper.LOST
+
+
+def test_observers(board):
+    cells, states = [], []
+    board.addCellObserver(lambda indices: cells.append(list(indices)))
+    board.addStateObserver(states.append)
+    board.uncoverTileAt(0, 1)
+    board.flagTileAt(0, 0)
+    board.flagMany([1, 0], [1, 0])
+    assert cells == [[1], [0], [11, 0]]
+    assert states == []
+    board.uncoverTileAt(0, 0)
+    assert cells[-1] == [0] and states == [minesweeper.LOST]
+    board.flagTileAt(5, 0)
+    assert states == [minesweeper.LOST] # the game stays lost
+
+
+def test_observers_not_called_without_changes(board):
+    calls = []
+    board.addCellObserver(calls.append)
+    board.uncoverTileAt(0, 1)
+    board.uncoverTileAt(0, 1)
+    board.chordTileAt(0, 1)
+    with pytest.raises(minesweeper.FlagError):
+        board.flagMany([0]*10 + [1], range(10) + [0])
+    assert len(calls) == 2 and len(calls[1]) == 10 # the flags placed before the error
+    board.removeCellObserver(calls.append)
+    board.flagTileAt(0, 0)
+    assert len(calls) == 2
+
+
+def test_update_state(board):
+    board.uncovered[0] = 1
+    board.updateState()
+    assert board.getState() == minesweeper.LOST
+
+
+# undo and redo
+
+def snapshot(b):
+    return (str(b.uncovered), str(b.flagged), b.getNumCoveredTiles(), b.getNumFlaggedTiles(), b.getState())
+
+
+def test_undo_redo_moves(board):
+    states = [snapshot(board)]
+    board.revealTileAt(0, 9) # flood fill
+    states.append(snapshot(board))
+    board.flagTileAt(0, 0)
+    states.append(snapshot(board))
+    board.flagMany([1, 0, 1], [1, 0, 1])
+    states.append(snapshot(board))
+    board.uncoverTileAt(2, 2) # mined
+    states.append(snapshot(board))
+    assert board.getNumMoves() == 4 and board.getState() == minesweeper.LOST
+    for k in xrange(4, 0, -1):
+        assert snapshot(board) == states[k]
+        assert board.undo() is not None
+    assert snapshot(board) == states[0]
+    assert board.undo() is None
+    for k in xrange(1, 5):
+        board.redo()
+        assert snapshot(board) == states[k]
+    assert board.redo() is None
+
+
+def test_moves_that_change_nothing_are_not_journaled(board):
+    board.uncoverTileAt(0, 1)
+    board.uncoverTileAt(0, 1)
+    board.chordTileAt(0, 1)
+    assert board.getNumMoves() == 1
+
+
+def test_new_move_forgets_redo(board):
+    board.uncoverTileAt(0, 1)
+    board.undo()
+    board.flagTileAt(5, 5)
+    assert board.redo() is None
+    assert board.getNumMoves() == 1
+
+
+def test_undo_notifies_observers(board):
+    cells, states = [], []
+    board.addCellObserver(lambda indices: cells.append(sorted(indices)))
+    board.addStateObserver(states.append)
+    board.uncoverTileAt(1, 1)
+    board.undo()
+    board.redo()
+    assert cells == [[11], [11], [11]]
+    assert states == [minesweeper.LOST, minesweeper.PLAYING, minesweeper.LOST]
+
+
+def test_undo_first_move_keeps_mines():
+    b = minesweeper.Board(20, 20, 60, seed=4, safeRadius=1)
+    b.uncoverTileAt(10, 10)
+    mined = str(b.mined)
+    b.undo()
+    assert b.getNumCoveredTiles() == 400 and b.minesPlaced
+    b.uncoverTileAt(0, 0)
+    assert str(b.mined) == mined
+
+
+def test_rollback_for_what_if_search(board):
+    board.uncoverTileAt(0, 1)
+    mark = board.getNumMoves()
+    before = snapshot(board)
+    board.flagTileAt(0, 0)
+    board.uncoverTileAt(0, 9)
+    board.uncoverTileAt(1, 1)
+    board.rollback(mark)
+    assert snapshot(board) == before
+    assert board.getNumMoves() == mark
+
+
+def test_undo_large_flood_fill():
+    b = minesweeper.Board(300, 300, 0)
+    b.revealTileAt(0, 0)
+    assert len(b.undo()) == 90000
+    assert b.getNumCoveredTiles() == 90000 and not any(b.uncovered)
+
+
+# non-square boards and bulk moves
+
+@pytest.mark.parametrize('width,height', [(30, 16), (16, 30), (1, 50), (50, 1)])
+def test_non_square_bounds(width, height):
+    b = minesweeper.Board(width, height, 1, bytearray(width*height)) # one flag allowed, no mines
+    b.flagTileAt(height-1, width-1)
+    assert b.getTileAt(height-1, width-1).isFlagged()
+    for row, col in [(height, 0), (0, width), (-1, 0), (0, -1)]:
+        with pytest.raises(IndexError):
+            b.flagTileAt(row, col)
+        with pytest.raises(IndexError):
+            b.uncoverTileAt(row, col)
+    b.flagTileAt(height-1, width-1)
+    assert len(b.revealTileAt(height-1, width-1)) == width*height
+
+
+def test_uncover_many_matches_single_moves():
+    moves = [(3, 7), (12, 25), (0, 0), (15, 29), (8, 1)] # all clear of mines with seed 3
+    single = minesweeper.Board(30, 16, 20, seed=3)
+    expected = []
+    for row, col in moves:
+        expected.extend(single.revealTileAt(row, col))
+    bulk = minesweeper.Board(30, 16, 20, seed=3)
+    rows, cols = zip(*moves)
+    revealed = bulk.uncoverMany(minesweeper.array('l', rows), minesweeper.array('l', cols))
+    assert list(revealed) == expected
+    assert bulk.uncovered == single.uncovered
+    assert bulk.getNumCoveredTiles() == single.getNumCoveredTiles()
+
+
+def test_uncover_many_stops_at_mine(board):
+    revealed = board.uncoverMany([0, 1, 2], [1, 1, 1])
+    assert list(revealed) == [1, 11]
+    assert not board.getTileAt(2, 1).isUncovered()
+
+
+def test_uncover_many_places_mines_on_first_move():
+    b = minesweeper.Board(20, 10, 50, seed=1, safeRadius=1)
+    revealed = b.uncoverMany([5, 0], [10, 0])
+    assert b.minesPlaced and not b.mined[5*20 + 10]
+    assert b.getNumCoveredTiles() == 200 - len(revealed)
+
+
+def test_uncover_many_validates_before_moving(board):
+    with pytest.raises(IndexError):
+        board.uncoverMany([0, 0, 10], [1, 2, 0])
+    assert board.getNumCoveredTiles() == 100
+    with pytest.raises(ValueError):
+        board.uncoverMany([0, 0], [1])
+    assert len(board.uncoverMany([], [])) == 0
+
+
+def test_flag_many(board):
+    board.flagMany([0, 1, 0], [0, 1, 0])
+    assert board.getNumFlaggedTiles() == 1
+    assert board.getTileAt(1, 1).isFlagged() and not board.getTileAt(0, 0).isFlagged()
+    with pytest.raises(IndexError):
+        board.flagMany([5, 5], [5, 10])
+    assert board.getNumFlaggedTiles() == 1
+
+
+def test_flag_many_limit(board):
+    with pytest.raises(minesweeper.FlagError):
+        board.flagMany([0]*10 + [1], range(10) + [0])
+    assert board.getNumFlaggedTiles() == 10
+    with pytest.raises(minesweeper.FlagError):
+        board.flagMany([1], [0])
+    assert board.getNumFlaggedTiles() == sum(board.flagged)
+
+
+# views and strings
+
+def test_tile_view_matches_tile_interface(board):
+    tile = board.getTileAt(4, 5)
+    assert (tile.getRow(), tile.getCol()) == (4, 5)
+    assert not tile.isMined() and not tile.isUncovered() and not tile.isFlagged()
+    assert tile.getNumber() == 2
+    tile.changeFlag()
+    assert board.flagged[45] == 1
+
+
+def test_get_neighbors(board):
+    assert sorted(board.getNeighbors(0)) == [1, 10, 11]
+    assert len(board.getNeighbors(55)) == 8
+
+
+def test_str(board):
+    board.flagTileAt(0, 0)
+    board.uncoverTileAt(0, 1)
+    lines = str(board).splitlines()
+    assert lines[0] == '-'*10
+    assert lines[1] == 'P2' + 'Q'*8
+    lines = board.__str__(True).splitlines()
+    assert lines[0] == 'GAME OVER'
+    assert lines[2] == 'X2' + 'Q'*8
+    assert lines[3] == 'Q!' + 'Q'*8
+
+
+def test_get_mined(board):
+    lines = board.getMined().splitlines()
+    assert lines[0] == 'Mines'
+    assert lines[1] == 'X210000000'
@@ -0,0 +1,111 @@
+import itertools
+import random
+import pytest
+import minesweeper
+import solver
+import probability
+
+
+def bruteForce(board):
+    """
+    Return the probability of each covered tile being mined, by counting every
+    mine layout that agrees with the uncovered numbers and the flags.
+    """
+    covered = [i for i in xrange(board.getNumTiles()) if not board.uncovered[i]]
+    mined = dict.fromkeys(covered, 0)
+    numLayouts = 0
+    for layout in itertools.combinations(covered, board.getNumMines()):
+        layout = set(layout)
+        if any(board.flagged[i] and i not in layout for i in covered):
+            continue
+        if all(sum(1 for j in board.getNeighbors(i) if j in layout) == board.numbers[i]
+               for i in xrange(board.getNumTiles()) if board.uncovered[i]):
+            numLayouts += 1
+            for i in layout:
+                mined[i] += 1
+    return dict((i, float(n) / numLayouts) for i, n in mined.iteritems())
+
+
+@pytest.mark.parametrize('seed', range(12))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    board = minesweeper.Board(5, 4, 5, seed=seed, safeRadius=0)
+    s = solver.Solver(board)
+    board.addCellObserver(s.update)
+    engine = probability.ProbabilityEngine(s)
+    board.revealTileAt(rng.randrange(4), rng.randrange(5))
+    for move in xrange(3):
+        if board.getState() != minesweeper.PLAYING:
+            break
+        if s.getMines() and rng.random() < 0.5:
+            board.flagTileAt(*s.getMines()[0])
+        expected = bruteForce(board)
+        for i, p in expected.iteritems():
+            assert engine.getProbabilityAt(*divmod(i, board.width)) == pytest.approx(p)
+        safe = [i for i in expected if not board.mined[i] and not board.flagged[i]]
+        if safe:
+            board.revealTileAt(*divmod(rng.choice(safe), board.width))
+
+
+def test_deductions_are_analyzed_first():
+    mined = bytearray(9)
+    mined[0] = mined[2] = 1
+    board = minesweeper.Board(3, 3, 2, mined)
+    s = solver.Solver(board)
+    board.addCellObserver(s.update)
+    engine = probability.ProbabilityEngine(s)
+    board.revealTileAt(2, 0)
+    assert engine.getProbabilityAt(0, 0) == 1.
+    assert engine.getProbabilityAt(0, 0) == 1.
+
+
+def test_flagged_mine_is_counted_once():
+    mined = bytearray(25)
+    mined[0] = mined[24] = 1
+    board = minesweeper.Board(5, 5, 2, mined)
+    s = solver.Solver(board)
+    board.addCellObserver(s.update)
+    engine = probability.ProbabilityEngine(s)
+    board.revealTileAt(2, 2)
+    assert engine.getProbabilities() == ({}, 0.)
+    board.flagTileAt(0, 0)
+    assert engine.getProbabilities() == ({}, 0.)
+
+
+def test_contradiction_is_clamped():
+    mined = bytearray(4)
+    mined[0] = 1
+    board = minesweeper.Board(4, 1, 1, mined)
+    board.flagTileAt(0, 3) # a wrong flag uses up the only mine
+    board.revealTileAt(0, 1)
+    board.revealTileAt(0, 2)
+    s = solver.Solver(board)
+    engine = probability.ProbabilityEngine(s)
+    assert s.getMines() == [(0, 0)]
+    assert engine.getProbabilities() == ({}, 0.)
+
+
+def test_many_components_do_not_overflow():
+    # 1100 separate pairs of tiles each holding one mine: 2**1100 layouts in all
+    width = 3300
+    mined = bytearray(2*width)
+    for col in xrange(0, width, 3):
+        mined[col] = 1
+    board = minesweeper.Board(width, 2, width // 3, mined)
+    for col in xrange(width):
+        if col % 3 and not board.uncovered[width + col]:
+            board.revealTileAt(1, col)
+    engine = probability.ProbabilityEngine(solver.Solver(board))
+    probabilities, other = engine.getProbabilities()
+    assert len(probabilities) == 2200
+    assert all(p == pytest.approx(0.5) for p in probabilities.itervalues())
+
+
+def test_safest_tile_in_component_too_big_to_enumerate():
+    # a 50/50: both covered tiles are seen by the same two numbers
+    board = minesweeper.Board(2, 2, 1, bytearray([1, 0, 0, 0]))
+    board.revealTileAt(1, 0)
+    board.revealTileAt(1, 1)
+    engine = probability.ProbabilityEngine(solver.Solver(board), maxComponentSize=1)
+    assert engine.getProbabilities() == ({}, 0.5)
+    assert engine.getSafestTile() == (0, 0)
@@ -0,0 +1,72 @@
+import os
+import pytest
+
+pygame = pytest.importorskip('pygame')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import render
+
+
+@pytest.fixture(scope='module')
+def display():
+    pygame.display.init()
+    pygame.font.init()
+    yield pygame.display.set_mode((64, 64), 0, 32)
+    pygame.quit()
+
+
+@pytest.fixture(scope='module')
+def atlas(display):
+    images = []
+    for k, color in enumerate([(255, 0, 0), (0, 255, 0), (0, 0, 255)]):
+        image = pygame.Surface((10, 10), pygame.SRCALPHA, 32)
+        image.fill(color)
+        images.append(('tile%d' % k, image))
+    return render.SpriteAtlas(images)
+
+
+def test_atlas_packs_sprites_side_by_side(atlas):
+    surface = atlas.getSurface(10)
+    assert surface.get_size() == (30, 10)
+    areas = atlas.getAreas(10)
+    assert areas['tile1'] == pygame.Rect(10, 0, 10, 10)
+    assert surface.get_at(areas['tile2'].center)[:3] == (0, 0, 255)
+
+
+def test_atlas_scales_once_per_size(atlas):
+    surface = atlas.getSurface(25)
+    assert surface.get_size() == (75, 25)
+    assert atlas.getSurface(25) is surface
+    assert atlas.getAreas(25)['tile2'] == pygame.Rect(50, 0, 25, 25)
+    # sprites are scaled separately, so their edges keep their own color
+    assert surface.get_at((49, 12))[:3] == (0, 255, 0)
+    assert surface.get_at((50, 12))[:3] == (0, 0, 255)
+    atlas.clear()
+    assert atlas.getSurface(25) is not surface
+    assert atlas.getSurface(10).get_size() == (30, 10)
+
+
+def test_atlas_batch_blit(atlas):
+    target = pygame.Surface((30, 10), 0, 32)
+    sheet, areas = atlas.getSurface(10), atlas.getAreas(10)
+    rects = target.blits([(sheet, (k*10, 0), areas['tile%d' % (2-k)]) for k in xrange(3)])
+    assert len(rects) == 3
+    assert [target.get_at((k*10 + 5, 5))[:3] for k in xrange(3)] == [(0, 0, 255), (0, 255, 0), (255, 0, 0)]
+
+
+def test_font_cache_remembers_paths(display, tmpdir, monkeypatch):
+    path = str(tmpdir.join('fonts.json'))
+    fonts = render.FontCache(path)
+    font = fonts.get('arial', 24, True)
+    assert fonts.get('arial', 24, True) is font
+    assert font.get_bold()
+    def noScan(*args, **kwargs):
+        raise AssertionError('SysFont should not be called')
+    monkeypatch.setattr(pygame.font, 'SysFont', noScan)
+    cached = render.FontCache(path)
+    assert cached.get('arial', 24, True).get_height() == font.get_height()
+
+
+def test_font_cache_ignores_corrupt_file(display, tmpdir):
+    path = tmpdir.join('fonts.json')
+    path.write('{not json')
+    assert render.FontCache(str(path)).get('arial', 14).get_height() > 0
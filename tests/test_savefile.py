@@ -0,0 +1,130 @@
+import random
+import pytest
+import minesweeper
+import savefile
+
+
+def playedBoard():
+    """
+    A non-square board with two flags and part of it uncovered.
+    """
+    b = minesweeper.Board(9, 5, 8, seed=4)
+    mines = [i for i in xrange(b.getNumTiles()) if b.mined[i]]
+    b.flagTileAt(*divmod(mines[0], b.width))
+    b.flagTileAt(*divmod(mines[1], b.width))
+    safe = [i for i in xrange(b.getNumTiles()) if not b.mined[i] and not b.flagged[i]]
+    b.revealTileAt(*divmod(safe[0], b.width))
+    b.revealTileAt(*divmod(safe[-1], b.width))
+    assert 0 < b.getNumCoveredTiles() < b.getNumTiles()
+    return b
+
+
+def assertSameBoard(a, b):
+    assert (a.width, a.height, a.getNumMines()) == (b.width, b.height, b.getNumMines())
+    assert a.mined == b.mined
+    assert a.numbers == b.numbers
+    assert a.uncovered == b.uncovered
+    assert a.flagged == b.flagged
+    assert a.getNumCoveredTiles() == b.getNumCoveredTiles()
+    assert a.getNumFlaggedTiles() == b.getNumFlaggedTiles()
+    assert a.getState() == b.getState()
+
+
+@pytest.mark.parametrize('n', range(18))
+def test_pack_bits_round_trip(n):
+    values = bytearray(random.Random(n).random() < 0.5 for i in xrange(n))
+    data = savefile.packBits(values)
+    assert len(data) == (n + 7) // 8
+    assert savefile.unpackBits(data, n) == values
+
+
+def test_pack_bits_puts_first_tile_in_high_bit():
+    assert savefile.packBits(bytearray([1, 0, 0, 0, 0, 0, 0, 0, 1])) == '\x80\x80'
+
+
+def test_dumps_loads_round_trip():
+    b = playedBoard()
+    data = savefile.dumps(b)
+    assert len(data) == savefile.BOARD_HEADER.size + 3*((9*5 + 7) // 8)
+    assertSameBoard(savefile.loads(data), b)
+
+
+def test_loads_restores_state():
+    b = minesweeper.Board(4, 3, 1, bytearray([1] + [0]*11))
+    b.revealTileAt(2, 3)
+    assert b.getState() == minesweeper.WON
+    assert savefile.loads(savefile.dumps(b)).getState() == minesweeper.WON
+
+
+def test_save_and_load_board(tmpdir):
+    b = playedBoard()
+    path = str(tmpdir.join('game.msw'))
+    savefile.saveBoard(b, path)
+    assertSameBoard(savefile.loadBoard(path), b)
+
+
+def test_load_empty_board_file(tmpdir):
+    path = tmpdir.join('empty.msw')
+    path.write('')
+    with pytest.raises(savefile.SaveFileError):
+        savefile.loadBoard(str(path))
+
+
+def test_dumps_before_mines_are_placed():
+    with pytest.raises(savefile.SaveFileError):
+        savefile.dumps(minesweeper.Board(5, 5, 3, seed=1, safeRadius=1))
+
+
+@pytest.mark.parametrize('corrupt', [
+    lambda data: 'XXXX' + data[4:], # bad magic
+    lambda data: data[:4] + chr(savefile.VERSION + 1) + data[5:], # unknown version
+    lambda data: data[:savefile.BOARD_HEADER.size - 1], # cut off in the header
+    lambda data: data[:-1], # cut off in the masks
+])
+def test_loads_rejects_bad_data(corrupt):
+    with pytest.raises(savefile.SaveFileError):
+        savefile.loads(corrupt(savefile.dumps(playedBoard())))
+
+
+def test_move_log_replays_game(tmpdir):
+    path = str(tmpdir.join('game.log'))
+    b = minesweeper.Board(9, 5, 8, seed=4)
+    start = savefile.dumps(b)
+    moves = [('f', 0, 0), ('u', 2, 4), ('f', 0, 0), ('f', 4, 8)]
+    with savefile.MoveLog(path) as log:
+        for action, row, col in moves[:2]:
+            log.append(action, row, col)
+    with savefile.MoveLog(path) as log: # reopening appends after the existing moves
+        for action, row, col in moves[2:]:
+            log.append(action, row, col)
+    assert savefile.readMoves(path) == moves
+    for action, row, col in moves:
+        if action == 'u':
+            b.uncoverTileAt(row, col)
+        else:
+            b.flagTileAt(row, col)
+    assertSameBoard(savefile.replay(savefile.loads(start), savefile.readMoves(path)), b)
+
+
+def test_move_log_rejects_unknown_action(tmpdir):
+    with savefile.MoveLog(str(tmpdir.join('game.log'))) as log:
+        with pytest.raises(ValueError):
+            log.append('x', 0, 0)
+
+
+def test_read_moves_drops_truncated_record(tmpdir):
+    path = str(tmpdir.join('game.log'))
+    with savefile.MoveLog(path) as log:
+        log.append('u', 1, 2)
+        log.append('f', 3, 4)
+    with open(path, 'ab') as f:
+        f.write(savefile.MOVE.pack(ord('u'), 5, 6)[:7]) # a move cut off mid-write
+    assert savefile.readMoves(path) == [('u', 1, 2), ('f', 3, 4)]
+
+
+@pytest.mark.parametrize('header', ['', 'MSW', 'MSWB\x01', 'MSWL\x02'])
+def test_read_moves_rejects_bad_header(tmpdir, header):
+    path = tmpdir.join('game.log')
+    path.write(header + savefile.MOVE.pack(ord('u'), 0, 0), 'wb')
+    with pytest.raises(savefile.SaveFileError):
+        savefile.readMoves(str(path))
@@ -0,0 +1,96 @@
+import random
+import pytest
+import minesweeper
+import solver
+
+
+def checkDeductions(s, board):
+    s.analyze()
+    assert not any(board.mined[i] for i in s.safe)
+    assert all(board.mined[i] for i in s.mines)
+    assert not any(board.flagged[i] or board.uncovered[i] for i in s.mines)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_deductions_are_sound(seed):
+    rng = random.Random(seed)
+    board = minesweeper.Board(16, 16, 40, seed=seed, safeRadius=1)
+    s = solver.Solver(board)
+    board.addCellObserver(s.update)
+    board.revealTileAt(8, 8)
+    while board.getState() == minesweeper.PLAYING:
+        checkDeductions(s, board)
+        if s.mines and rng.random() < 0.5: # flag a deduced mine
+            board.flagTileAt(*divmod(min(s.mines), board.width))
+        elif s.safe:
+            board.revealTileAt(*divmod(min(s.safe), board.width))
+        else: # guess
+            covered = [i for i in xrange(board.getNumTiles()) if not board.uncovered[i] and not board.flagged[i]]
+            board.revealTileAt(*divmod(rng.choice(covered), board.width))
+    if board.getState() == minesweeper.WON: # after a loss the uncovered mine reads as a number
+        checkDeductions(s, board)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_deductions_are_sound_after_wrong_flags_and_undos(seed):
+    rng = random.Random(seed)
+    board = minesweeper.Board(9, 9, 10, seed=seed, safeRadius=1)
+    s = solver.Solver(board)
+    board.addCellObserver(s.update)
+    board.revealTileAt(4, 4)
+    while board.getState() == minesweeper.PLAYING:
+        if board.getNumMoves() > 3 and rng.random() < 0.2:
+            board.rollback(board.getNumMoves() - 3) # take back the last flag, unflag and uncover
+            checkDeductions(s, board)
+        covered = [i for i in xrange(board.getNumTiles()) if not board.uncovered[i] and not board.flagged[i]]
+        # flag a tile next to a number, which may be wrong, let the solver deduce from it, then unflag it
+        row, col = divmod(rng.choice([i for i in covered if i in s.cellConstraints] or covered), board.width)
+        board.flagTileAt(row, col)
+        s.analyze()
+        board.flagTileAt(row, col)
+        checkDeductions(s, board)
+        if s.safe:
+            board.revealTileAt(*divmod(min(s.safe), board.width))
+        else: # guess
+            board.revealTileAt(*divmod(rng.choice(covered), board.width))
+
+
+def test_unflagging_takes_back_deductions():
+    mined = bytearray(5)
+    mined[2] = 1
+    board = minesweeper.Board(5, 1, 1, mined)
+    s = solver.Solver(board)
+    s.uncoverTileAt(0, 1)
+    s.flagTileAt(0, 0) # wrong, so (0, 2) looks safe
+    assert s.getHint() == (0, 2)
+    s.flagTileAt(0, 0)
+    assert s.getHint() is None
+    assert s.getMines() == []
+    assert s.getSafeTiles() == []
+
+
+def test_flagged_mine_leaves_deduced_mines():
+    mined = bytearray(25)
+    mined[0] = mined[24] = 1
+    board = minesweeper.Board(5, 5, 2, mined)
+    s = solver.Solver(board)
+    board.addCellObserver(s.update)
+    board.revealTileAt(2, 2)
+    assert s.getMines() == [(0, 0), (4, 4)]
+    board.flagTileAt(0, 0)
+    assert s.getMines() == [(4, 4)]
+    board.flagTileAt(0, 0) # unflagged again, so it is deduced again
+    assert s.getMines() == [(0, 0), (4, 4)]
+
+
+def test_enumeration_finds_what_the_rules_cannot():
+    # 1-2-1 along an edge: the tiles under the 1s are mines, the one under the 2 is safe
+    mined = bytearray(9)
+    mined[6] = mined[8] = 1
+    board = minesweeper.Board(3, 3, 2, mined)
+    for col in xrange(3):
+        board.revealTileAt(0, col)
+        board.revealTileAt(1, col)
+    s = solver.Solver(board)
+    assert s.getMines() == [(2, 0), (2, 2)]
+    assert s.getSafeTiles() == [(2, 1)]